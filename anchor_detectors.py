@@ -0,0 +1,260 @@
+import os
+import time
+
+import cv2
+
+from hand_tracking import AnchorSmoother
+
+CASCADE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "haarcascade_frontalface_default.xml")
+# Ordem de preferência da seleção automática: fica o primeiro que cabe no orçamento
+AUTO_ORDER = ("mediapipe", "tracker", "haar")
+TRACKER_TYPES = ("KCF", "CSRT", "MIL")
+
+
+class AnchorDetector:
+    # Interface dos detectores usados pelo CameraApp.detect_hands (mesma do
+    # HandTracker): process() devolve as âncoras normalizadas (0 a 1) já
+    # suavizadas; detect() só detecta, sem filtro nem frames pulados.
+    name = None
+    mp_hands = None
+    hands = None
+
+    def __init__(self, inference_width=320, detect_every=1, smoothing=True, min_cutoff=1.2, beta=0.02):
+        self.inference_width = inference_width
+        self.detect_every = max(1, detect_every)
+        self.smoother = AnchorSmoother(smoothing, min_cutoff, beta)
+        self._frame_count = 0
+
+    def detect(self, frame_bgr):
+        raise NotImplementedError
+
+    def downscale(self, frame_bgr):
+        h, w = frame_bgr.shape[:2]
+        if not self.inference_width or w <= self.inference_width: return frame_bgr
+        return cv2.resize(frame_bgr, (self.inference_width, int(h * self.inference_width / w)), interpolation=cv2.INTER_AREA)
+
+    def process(self, frame_bgr, timestamp=None):
+        t = time.perf_counter() if timestamp is None else timestamp
+        run_detection = self._frame_count % self.detect_every == 0
+        self._frame_count += 1
+        if not run_detection: return self.smoother.predict(t)
+        return self.smoother.update(self.detect(frame_bgr), t)
+
+    def reset(self):
+        self.smoother.reset()
+        self._frame_count = 0
+
+    def warm_up(self, width=640, height=480):
+        for frame in benchmark_frames(width, height, 2)[0]: self.detect(frame)
+        self.reset()
+
+    def measure(self, frames, anchors):
+        # Custo médio de process() por frame, em ms
+        start = time.perf_counter()
+        for frame in frames: self.process(frame)
+        return (time.perf_counter() - start) / len(frames) * 1000
+
+    def close(self):
+        pass
+
+
+class HaarFaceDetector(AnchorDetector):
+    # Alternativa leve ao MediaPipe para máquinas fracas: detecta rostos com o
+    # cascade Haar que acompanha o projeto e ancora o overlay acima da cabeça
+    # (vertical_offset em alturas de rosto a partir do centro; 0 = no rosto).
+    name = "haar"
+
+    def __init__(self, cascade_path=CASCADE_PATH, inference_width=320, detect_every=3, max_faces=2,
+                 scale_factor=1.2, min_neighbors=5, min_size=0.12, vertical_offset=-0.9, **options):
+        super().__init__(inference_width, detect_every, **options)
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty(): raise RuntimeError(f"Não foi possível carregar o cascade {cascade_path}")
+        self.max_faces = max_faces
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self.vertical_offset = vertical_offset
+
+    def detect(self, frame_bgr):
+        small = self.downscale(frame_bgr)
+        h, w = small.shape[:2]
+        gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        min_side = int(min(w, h) * self.min_size)
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+                                              minSize=(min_side, min_side))
+        # Os maiores primeiro: quem está mais perto da câmera
+        faces = sorted(faces, key=lambda face: face[2] * face[3], reverse=True)[:self.max_faces]
+        return [((x + fw / 2) / w, min(max((y + fh / 2 + self.vertical_offset * fh) / h, 0.0), 1.0)) for x, y, fw, fh in faces]
+
+
+def opencv_tracker_factory(types=TRACKER_TYPES):
+    # CSRT e KCF vêm do opencv-contrib (em versões novas, em cv2.legacy); o MIL
+    # existe no opencv-python comum e fica como último recurso
+    for tracker_type in types:
+        for module in (cv2, getattr(cv2, "legacy", None)):
+            create = getattr(module, f"Tracker{tracker_type}_create", None) if module else None
+            if create: return tracker_type, create
+    raise RuntimeError(f"Nenhum tracker do OpenCV disponível entre {', '.join(types)}")
+
+
+class TrackerOnlyDetector(AnchorDetector):
+    # Detecta com outro detector uma vez e depois só acompanha cada âncora com
+    # um tracker do OpenCV, bem mais barato que detectar de novo. Volta a
+    # detectar quando algum tracker se perde ou a cada redetect_every frames;
+    # sem ninguém na imagem, procura só a cada search_every frames.
+    name = "tracker"
+
+    def __init__(self, detector, tracker_types=TRACKER_TYPES, inference_width=320, redetect_every=90,
+                 search_every=3, box_size=0.2, **options):
+        super().__init__(inference_width, 1, **options)
+        self.detector = detector
+        self.mp_hands = getattr(detector, "mp_hands", None)
+        self.hands = getattr(detector, "hands", None)
+        self.tracker_type, self._create_tracker = opencv_tracker_factory(tracker_types)
+        self.redetect_every = redetect_every
+        self.search_every = max(1, search_every)
+        self.box_size = box_size
+        self._trackers = []
+        self._frames_tracked = 0
+
+    def detect(self, frame_bgr):
+        return self.detector.detect(frame_bgr)
+
+    def _start_tracking(self, frame_bgr, anchors):
+        small = self.downscale(frame_bgr)
+        h, w = small.shape[:2]
+        side = max(8, int(self.box_size * w))
+        self._trackers = []
+        self._frames_tracked = 0
+        for x, y in anchors:
+            left = min(max(int(x * w) - side // 2, 0), w - side)
+            top = min(max(int(y * h) - side // 2, 0), h - side)
+            tracker = self._create_tracker()
+            tracker.init(small, (left, top, side, side))
+            self._trackers.append(tracker)
+
+    def _track(self, frame_bgr):
+        # None quando é preciso detectar de novo
+        if self._frames_tracked >= self.redetect_every: return None
+        small = self.downscale(frame_bgr)
+        h, w = small.shape[:2]
+        anchors = []
+        for tracker in self._trackers:
+            ok, (left, top, box_w, box_h) = tracker.update(small)
+            if not ok: return None
+            anchors.append(((left + box_w / 2) / w, (top + box_h / 2) / h))
+        self._frames_tracked += 1
+        return anchors
+
+    def process(self, frame_bgr, timestamp=None):
+        t = time.perf_counter() if timestamp is None else timestamp
+        if self._trackers:
+            anchors = self._track(frame_bgr)
+            if anchors is not None: return self.smoother.update(anchors, t)
+        else:
+            searching = self._frame_count % self.search_every != 0
+            self._frame_count += 1
+            if searching: return self.smoother.predict(t)
+        anchors = self.detector.detect(frame_bgr)
+        self._start_tracking(frame_bgr, anchors)
+        return self.smoother.update(anchors, t)
+
+    def reset(self):
+        super().reset()
+        self._trackers = []
+        self._frames_tracked = 0
+
+    def measure(self, frames, anchors):
+        # Os frames de teste não têm mãos/rostos de verdade, então a detecção
+        # nunca acha nada e o caminho de tracking precisa ser medido à parte:
+        # os trackers começam nas posições conhecidas (anchors) e seguem por
+        # todos os frames. O custo é o pior entre procurar (sem ninguém na
+        # imagem) e acompanhar, somando a redetecção periódica.
+        searching = super().measure(frames, anchors)
+        self.reset()
+        start = time.perf_counter()
+        self.detector.detect(frames[0])
+        detect_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        self._start_tracking(frames[0], anchors[0])
+        for frame, frame_anchors in zip(frames[1:], anchors[1:]):
+            # Um tracker perdido recomeça na posição conhecida, como faria a redetecção
+            if self._track(frame) is None: self._start_tracking(frame, frame_anchors)
+        tracking = (time.perf_counter() - start) / max(1, len(frames) - 1) * 1000
+        return max(searching, tracking + detect_ms / self.redetect_every)
+
+    def warm_up(self, width=640, height=480):
+        self.detector.warm_up(width, height)
+        self.reset()
+
+    def close(self):
+        self.detector.close()
+
+
+def create_detector(name, **options):
+    if name == "mediapipe":
+        from hand_tracking import HandTracker
+        options = {"inference_width": 320, "detect_every": 2, "model_complexity": 0, "max_num_hands": 2, **options}
+        return HandTracker(**options)
+    if name == "haar":
+        return HaarFaceDetector(**options)
+    if name == "tracker":
+        # Detecta com o MediaPipe (uma inferência por vez) ou, sem ele, com o cascade
+        try:
+            base = create_detector("mediapipe", detect_every=1)
+        except ImportError:
+            base = HaarFaceDetector(detect_every=1)
+        return TrackerOnlyDetector(base, **options)
+    raise ValueError(f"Detector de âncora desconhecido: {name}")
+
+
+def benchmark_frames(width=640, height=480, count=30):
+    # Frames sintéticos e a posição conhecida da "mão" em cada um
+    from frame_sources import SyntheticSource
+    source = SyntheticSource(width, height, hands=1, max_frames=count)
+    frames, anchors = [], []
+    for frame in source:
+        frames.append(frame)
+        anchors.append(list(source.anchors))
+    return frames, anchors
+
+
+def measure_detector(detector, frames, anchors=None):
+    # Custo médio por frame, em ms, depois do aquecimento
+    height, width = frames[0].shape[:2]
+    detector.warm_up(width, height)
+    anchors = anchors or [[(0.5, 0.5)]] * len(frames)
+    measure = getattr(detector, "measure", None)
+    if measure: elapsed_ms = measure(frames, anchors)
+    else:
+        start = time.perf_counter()
+        for frame in frames: detector.process(frame)
+        elapsed_ms = (time.perf_counter() - start) / len(frames) * 1000
+    detector.reset()
+    return elapsed_ms
+
+
+def select_detector(names=AUTO_ORDER, budget_ms=15.0, frames=None, anchors=None):
+    # Mede cada backend (na ordem de preferência) e fica com o primeiro que
+    # cabe no orçamento por frame; se nenhum couber, com o mais rápido.
+    # Devolve (detector, {nome: ms}).
+    if frames is None: frames, anchors = benchmark_frames()
+    timings = {}
+    fastest = None
+    for name in names:
+        try:
+            detector = create_detector(name)
+        except (ImportError, AttributeError, RuntimeError, cv2.error) as e:
+            print(f"Detector '{name}' indisponível: {e}")
+            continue
+        timings[name] = round(measure_detector(detector, frames, anchors), 2)
+        if timings[name] <= budget_ms:
+            if fastest: fastest[1].close()
+            return detector, timings
+        if fastest is None or timings[name] < fastest[0]:
+            if fastest: fastest[1].close()
+            fastest = (timings[name], detector)
+        else:
+            detector.close()
+    if fastest is None: raise RuntimeError("Nenhum detector de âncora disponível.")
+    return fastest[1], timings
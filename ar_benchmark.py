@@ -0,0 +1,201 @@
+import argparse
+import base64
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from asset_cache import RewardAssetCache
+from frame_encoder import AdaptiveFrameEncoder
+from frame_sources import ImageSequenceSource, ScriptedDetector, SyntheticSource, VideoFileSource, WebcamSource
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+STAGES = ("capture", "detect", "composite", "encode", "base64")
+
+
+def _summary(samples):
+    if not samples: return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    values = np.array(samples) * 1000
+    return {"mean_ms": round(float(values.mean()), 3), "p50_ms": round(float(np.percentile(values, 50)), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3), "max_ms": round(float(values.max()), 3)}
+
+
+def _max_rss_mb():
+    if resource is None: return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB, macOS em bytes
+    return round(rss / (1024 * 1024) if platform.system() == "Darwin" else rss / 1024, 1)
+
+
+def process_frame(frame, detector, overlay, encoder):
+    anchors = detector.process(frame, time.perf_counter())
+    frame_h, frame_w = frame.shape[:2]
+    for anchor_x, anchor_y in anchors:
+        overlay.blend_into(frame, int(anchor_x * frame_w) - overlay.width // 2, int(anchor_y * frame_h) - overlay.height // 2)
+    data = encoder.encode(frame)
+    return base64.b64encode(data) if data is not None else b""
+
+
+def measure_memory(source, detector, overlay, encoder, max_frames=60):
+    # Passada separada com tracemalloc: ligado durante a medição de tempo ele
+    # deixa cada alocação (e portanto os estágios) bem mais lenta
+    source.resume()
+    tracemalloc.start()
+    for _ in range(max_frames):
+        frame = source.read()
+        if frame is None: break
+        process_frame(frame, detector, overlay, encoder)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(peak / (1024 * 1024), 2)
+
+
+def run_case(source, detector, overlay, encoder, warmup_frames=10, max_frames=None):
+    # Mesmo caminho do CameraApp (capture -> detect -> composite -> encode ->
+    # base64), só que em sequência, sem Flet e medindo cada estágio.
+    timings = {stage: [] for stage in STAGES}
+    encoded_bytes = 0
+    frames = 0
+    source.resume()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    while max_frames is None or frames < max_frames:
+        t0 = time.perf_counter()
+        frame = source.read()
+        if frame is None: break
+        t1 = time.perf_counter()
+        anchors = detector.process(frame, t1)
+        t2 = time.perf_counter()
+        frame_h, frame_w = frame.shape[:2]
+        for anchor_x, anchor_y in anchors:
+            overlay.blend_into(frame, int(anchor_x * frame_w) - overlay.width // 2, int(anchor_y * frame_h) - overlay.height // 2)
+        t3 = time.perf_counter()
+        data = encoder.encode(frame)
+        t4 = time.perf_counter()
+        payload = base64.b64encode(data) if data is not None else b""
+        t5 = time.perf_counter()
+        frames += 1
+        if frames <= warmup_frames:
+            if frames == warmup_frames:
+                cpu_start, wall_start = time.process_time(), time.perf_counter()
+            continue
+        for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+            timings[stage].append(seconds)
+        encoded_bytes += len(data or b"")
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    measured = max(frames - warmup_frames, 0)
+    return {
+        "frames": measured,
+        "fps": round(measured / wall, 2) if wall > 0 else 0.0,
+        "cpu_percent": round(100 * cpu / wall, 1) if wall > 0 else 0.0,
+        "max_rss_mb": _max_rss_mb(),
+        "encoded_kb_per_frame": round(encoded_bytes / 1024 / measured, 2) if measured else 0.0,
+        "stages": {stage: _summary(samples) for stage, samples in timings.items()},
+    }
+
+
+def build_source(args, width, height, hands, max_frames=None):
+    max_frames = max_frames or args.frames
+    if args.source == "synthetic":
+        return SyntheticSource(width, height, hands=hands, max_frames=max_frames)
+    if args.source == "webcam":
+        # O limite de frames da webcam fica no run_case/measure_memory
+        return WebcamSource(device=args.device, width=width, height=height, fps=30)
+    if args.source == "video":
+        return VideoFileSource(args.path, loop=True, max_frames=max_frames)
+    return ImageSequenceSource(args.path, loop=True, max_frames=max_frames)
+
+
+def build_detector(args, source):
+    if args.detector == "scripted":
+        # Fontes reais não têm posições conhecidas: o overlay não é desenhado
+        return ScriptedDetector(source)
+    from anchor_detectors import create_detector
+    options = {"inference_width": args.inference_width}
+    if args.detector != "tracker": options["detect_every"] = args.detect_every
+    detector = create_detector(args.detector, **options)
+    detector.warm_up()
+    return detector
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f: previous = {case["name"]: case for case in json.load(f)["cases"]}
+    for case in current["cases"]:
+        old = previous.get(case["name"])
+        if not old: continue
+        delta = (case["fps"] - old["fps"]) / old["fps"] * 100 if old["fps"] else 0.0
+        print(f"  {case['name']}: {old['fps']:.1f} -> {case['fps']:.1f} FPS ({delta:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do caminho de AR (captura, mãos, overlay, JPEG) sem Flet.")
+    parser.add_argument("--source", choices=("synthetic", "webcam", "video", "images"), default="synthetic")
+    parser.add_argument("--device", type=int, default=0, help="Índice da webcam (--source webcam)")
+    parser.add_argument("--path", help="Vídeo (--source video) ou padrão glob de imagens (--source images)")
+    parser.add_argument("--detector", choices=("scripted", "mediapipe", "haar", "tracker"), default="scripted")
+    parser.add_argument("--resolutions", default="640x480,1280x720,1920x1080")
+    parser.add_argument("--hands", default="0,1,2")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--memory-frames", type=int, default=60, help="Frames da passada separada que mede a memória (0 desliga)")
+    parser.add_argument("--inference-width", type=int, default=320)
+    parser.add_argument("--detect-every", type=int, default=2)
+    parser.add_argument("--overlay", default="mouse.png")
+    parser.add_argument("--output", help="Salva os resultados em JSON")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar o FPS")
+    args = parser.parse_args()
+    if args.source in ("video", "images") and not args.path: parser.error("--path é obrigatório para vídeo/imagens")
+
+    overlay = RewardAssetCache("assets").get(args.overlay, 150)
+    resolutions = [tuple(int(v) for v in r.split("x")) for r in args.resolutions.split(",")]
+    hand_counts = [int(h) for h in args.hands.split(",")]
+    if args.source in ("video", "images"):
+        # A resolução e o número de mãos vêm do próprio vídeo/imagens
+        resolutions, hand_counts = [(None, None)], [None]
+    elif args.source == "webcam":
+        hand_counts = [None]
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(), "python": platform.python_version(),
+        "opencv": cv2.__version__, "cpu_count": os.cpu_count(),
+        "detector": args.detector, "source": args.source, "cases": [],
+    }
+    for width, height in resolutions:
+        for hands in hand_counts:
+            source = build_source(args, width, height, hands)
+            detector = build_detector(args, source)
+            encoder = AdaptiveFrameEncoder(max_width=640, quality=75, skip_threshold=0)
+            if hands is not None: name = f"{width}x{height}-{hands}maos"
+            elif width is not None: name = f"{args.source}-{width}x{height}"
+            else: name = args.source
+            case = {"name": name, "width": width, "height": height, "hands": hands}
+            case.update(run_case(source, detector, overlay, encoder, max_frames=args.frames))
+            source.close(); detector.close()
+            case["peak_python_memory_mb"] = None
+            if args.memory_frames:
+                source = build_source(args, width, height, hands, max_frames=args.memory_frames)
+                detector = build_detector(args, source)
+                encoder = AdaptiveFrameEncoder(max_width=640, quality=75, skip_threshold=0)
+                case["peak_python_memory_mb"] = measure_memory(source, detector, overlay, encoder, args.memory_frames)
+                source.close(); detector.close()
+            results["cases"].append(case)
+            stages = " ".join(f"{stage}={case['stages'][stage]['mean_ms']:.2f}" for stage in STAGES)
+            print(f"{name}: {case['fps']:.1f} FPS, CPU {case['cpu_percent']:.0f}%, pico {case['peak_python_memory_mb']} MB | ms: {stages}")
+
+    if args.output:
+        with open(args.output, "w") as f: json.dump(results, f, indent=2)
+        print(f"Resultados salvos em {args.output}")
+    if args.compare:
+        print(f"Comparação com {args.compare}:")
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+
+from compositing import PremultipliedOverlay
+
+
+class RewardAssetCache:
+    # Guarda variantes já redimensionadas e pré-multiplicadas de cada imagem de
+    # recompensa por largura, com limite LRU. O PNG original (alguns têm
+    # milhares de pixels de lado) só é decodificado para gerar as variantes e
+    # não fica em memória.
+    def __init__(self, assets_dir="assets", max_variants=32):
+        self.assets_dir = assets_dir
+        self.max_variants = max_variants
+        self._errors = {}
+        self._variants = OrderedDict()
+        self._lock = threading.Lock()
+        self._preload_thread = None
+
+    def preload(self, image_filenames, widths=(150,)):
+        filenames = sorted(set(image_filenames))
+
+        def worker():
+            for filename in filenames:
+                missing = [width for width in widths if not self.has(filename, width)]
+                if not missing: continue
+                try:
+                    # Uma decodificação por arquivo para todas as larguras
+                    source = self.get_source(filename)
+                    for width in missing: self._store(filename, width, source)
+                except ValueError:
+                    continue
+            if self._errors:
+                print(f"Imagens de recompensa inválidas: {', '.join(sorted(self._errors))}")
+
+        self._preload_thread = threading.Thread(target=worker, daemon=True)
+        self._preload_thread.start()
+        return self._preload_thread
+
+    def wait_until_loaded(self, timeout=None):
+        if self._preload_thread: self._preload_thread.join(timeout)
+
+    def error_for(self, image_filename):
+        return self._errors.get(image_filename)
+
+    def has(self, image_filename, width):
+        with self._lock: return (image_filename, width) in self._variants
+
+    def get_source(self, image_filename):
+        # Decodifica o PNG original (sem cache)
+        with self._lock:
+            if image_filename in self._errors: raise ValueError(self._errors[image_filename])
+        image = cv2.imread(os.path.join(self.assets_dir, image_filename), cv2.IMREAD_UNCHANGED)
+        if image is None or image.ndim != 3 or image.shape[2] != 4:
+            with self._lock: self._errors[image_filename] = f"Imagem '{image_filename}' não encontrada ou sem transparência."
+            raise ValueError(self._errors[image_filename])
+        return image
+
+    def get(self, image_filename, width):
+        key = (image_filename, width)
+        with self._lock:
+            overlay = self._variants.get(key)
+            if overlay is not None:
+                self._variants.move_to_end(key)
+                return overlay
+        return self._store(image_filename, width, self.get_source(image_filename))
+
+    def _store(self, image_filename, width, source):
+        key = (image_filename, width)
+        height = max(1, int(width * (source.shape[0] / source.shape[1])))
+        interpolation = cv2.INTER_AREA if width < source.shape[1] else cv2.INTER_LINEAR
+        overlay = PremultipliedOverlay(cv2.resize(source, (width, height), interpolation=interpolation))
+        with self._lock:
+            self._variants[key] = overlay
+            self._variants.move_to_end(key)
+            while len(self._variants) > self.max_variants:
+                self._variants.popitem(last=False)
+        return overlay
+
+
+_default_caches = {}
+_default_lock = threading.Lock()
+
+
+def default_asset_cache(assets_dir="assets"):
+    # Um cache por pasta, compartilhado por todos os CameraApp do processo
+    with _default_lock:
+        if assets_dir not in _default_caches: _default_caches[assets_dir] = RewardAssetCache(assets_dir)
+        return _default_caches[assets_dir]
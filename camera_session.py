@@ -0,0 +1,160 @@
+import atexit
+import sys
+import threading
+import time
+
+import cv2
+
+
+def default_backends():
+    # DirectShow só existe no Windows; nas outras plataformas usa o backend nativo
+    if sys.platform.startswith("win"): return [cv2.CAP_DSHOW, cv2.CAP_MSMF, cv2.CAP_ANY]
+    if sys.platform.startswith("linux"): return [cv2.CAP_V4L2, cv2.CAP_ANY]
+    if sys.platform == "darwin": return [cv2.CAP_AVFOUNDATION, cv2.CAP_ANY]
+    return [cv2.CAP_ANY]
+
+
+class CameraSession:
+    # Mantém a câmera aberta durante todo o jogo. Entre recompensas a sessão
+    # fica pausada: com keep_warm uma thread continua chamando grab() para o
+    # dispositivo não desligar e o buffer não acumular frames velhos. Pode ser
+    # compartilhada (default_camera_session): cada resume() conta um usuário e
+    # a sessão só pausa quando o último chama pause().
+    def __init__(self, device=0, backends=None, width=None, height=None, fps=None, mirror=False,
+                 keep_warm=True, warm_interval=0.1, max_read_failures=5, reopen_delay=0.5):
+        self.device = device
+        self.backends = backends or default_backends()
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.mirror = mirror
+        self.keep_warm = keep_warm
+        self.warm_interval = warm_interval
+        self.max_read_failures = max_read_failures
+        self.reopen_delay = reopen_delay
+        self.backend = None
+        self.cap = None
+        self.paused = True
+        self.users = 0
+        self.open_seconds = None
+        self.time_to_first_frame = None
+        self.reopen_count = 0
+        self._lock = threading.RLock()
+        self._resumed_at = None
+        self._warm_thread = None
+        self._closed = False
+
+    def is_open(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def open(self):
+        with self._lock:
+            if self.is_open(): return True
+            self._closed = False
+            start = time.perf_counter()
+            for backend in self.backends:
+                cap = cv2.VideoCapture(self.device, backend)
+                if not cap.isOpened():
+                    cap.release()
+                    continue
+                self._configure(cap)
+                self.cap, self.backend = cap, backend
+                self.open_seconds = time.perf_counter() - start
+                print(f"Câmera aberta em {self.open_seconds * 1000:.0f} ms (backend {cap.getBackendName()}).")
+                break
+            else:
+                print("Erro: Não foi possível abrir a câmera.")
+                return False
+        if self.keep_warm: self._start_warm_thread()
+        return True
+
+    def _configure(self, cap):
+        if self.width: cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height: cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps: cap.set(cv2.CAP_PROP_FPS, self.fps)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def resume(self):
+        if not self.open(): return False
+        with self._lock:
+            self.users += 1
+            if not self.paused: return True
+            self.paused = False
+            self._resumed_at = time.perf_counter()
+            self.time_to_first_frame = None
+        return True
+
+    def pause(self):
+        with self._lock:
+            self.users = max(0, self.users - 1)
+            self.paused = self.users == 0
+
+    def read(self):
+        failures = 0
+        while not self._closed:
+            with self._lock:
+                ret, frame = self.cap.read() if self.is_open() else (False, None)
+                if ret:
+                    if self._resumed_at is not None:
+                        self.time_to_first_frame = time.perf_counter() - self._resumed_at
+                        self._resumed_at = None
+                    return cv2.flip(frame, 1) if self.mirror else frame
+            failures += 1
+            if failures >= self.max_read_failures:
+                if not self._reopen(): return None
+                failures = 0
+        return None
+
+    def _reopen(self):
+        print("Falha na leitura da câmera, reabrindo o dispositivo...")
+        with self._lock:
+            if self.cap is not None: self.cap.release()
+            self.cap = None
+            self.reopen_count += 1
+        time.sleep(self.reopen_delay)
+        return self.open()
+
+    def _start_warm_thread(self):
+        if self._warm_thread and self._warm_thread.is_alive(): return
+        self._warm_thread = threading.Thread(target=self._warm_loop, daemon=True)
+        self._warm_thread.start()
+
+    def _warm_loop(self):
+        while not self._closed:
+            if self.paused:
+                with self._lock:
+                    if self.paused and self.is_open(): self.cap.grab()
+            time.sleep(self.warm_interval)
+
+    def stats(self):
+        return {
+            "backend": self.cap.getBackendName() if self.is_open() else None,
+            "open_ms": self.open_seconds * 1000 if self.open_seconds is not None else None,
+            "time_to_first_frame_ms": self.time_to_first_frame * 1000 if self.time_to_first_frame is not None else None,
+            "reopen_count": self.reopen_count,
+        }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self.paused = True
+            self.users = 0
+            if self.cap is not None: self.cap.release()
+            self.cap = None
+        if self._warm_thread and self._warm_thread is not threading.current_thread():
+            self._warm_thread.join()
+
+
+_default_sessions = {}
+_default_lock = threading.Lock()
+
+
+def default_camera_session(device=0, **options):
+    # Uma sessão por dispositivo para todo o processo: no V4L2 só um
+    # VideoCapture consegue abrir a câmera, então as sessões web a dividem.
+    # As opções valem para quem criar a sessão primeiro.
+    with _default_lock:
+        if device not in _default_sessions:
+            _default_sessions[device] = CameraSession(device, **options)
+            atexit.register(_default_sessions[device].close)
+        return _default_sessions[device]
@@ -0,0 +1,121 @@
+import threading
+
+import numpy as np
+
+
+class PremultipliedOverlay:
+    # Overlay BGRA pré-multiplicado em ponto fixo (uint16), pronto para ser
+    # misturado direto no frame sem conversões para float a cada quadro. Depois
+    # de criado não muda: os buffers de trabalho são por thread, então o mesmo
+    # overlay pode ser usado por várias sessões ao mesmo tempo.
+    def __init__(self, overlay_bgra):
+        if overlay_bgra is None or overlay_bgra.ndim != 3 or overlay_bgra.shape[2] != 4:
+            raise ValueError("O overlay precisa ser uma imagem BGRA (com canal alfa).")
+        overlay_bgra = np.ascontiguousarray(overlay_bgra, dtype=np.uint8)
+        alpha = overlay_bgra[:, :, 3:4].astype(np.uint16)
+        self.height, self.width = overlay_bgra.shape[:2]
+        self.shape = overlay_bgra.shape
+        # cor * alfa + 128 (arredondamento) e 255 - alfa, ambos em uint16 e já
+        # expandidos para 3 canais: broadcast no numpy sai bem mais lento aqui
+        self.premultiplied = overlay_bgra[:, :, :3].astype(np.uint16) * alpha + 128
+        self.inverse_alpha = np.repeat(255 - alpha, 3, axis=2)
+        self.is_opaque = bool((alpha == 255).all())
+        self.is_transparent = bool((alpha == 0).all())
+        self._local = threading.local()
+        self._opaque_bgr = np.ascontiguousarray(overlay_bgra[:, :, :3]) if self.is_opaque else None
+
+    def _scratch(self):
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = np.empty((3, self.height, self.width, 3), dtype=np.uint16)
+            self._local.scratch = scratch
+        return scratch
+
+    def blend_into(self, frame, x, y):
+        # Recorta o overlay nas bordas do frame usando apenas views (sem cópias)
+        h_bg, w_bg = frame.shape[:2]
+        x, y = int(x), int(y)
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(x + self.width, w_bg), min(y + self.height, h_bg)
+        if x2 <= x1 or y2 <= y1 or self.is_transparent:
+            return frame
+        ox1, oy1 = x1 - x, y1 - y
+        ox2, oy2 = ox1 + (x2 - x1), oy1 + (y2 - y1)
+        roi = frame[y1:y2, x1:x2, :3]
+        if self.is_opaque:
+            roi[...] = self._opaque_bgr[oy1:oy2, ox1:ox2]
+            return frame
+        acc, tmp, src = self._scratch()[:, oy1:oy2, ox1:ox2]
+        # acc = fundo*(255 - alfa) + cor*alfa + 128, depois divisão exata por 255
+        np.copyto(src, roi)
+        np.multiply(src, self.inverse_alpha[oy1:oy2, ox1:ox2], out=acc)
+        np.add(acc, self.premultiplied[oy1:oy2, ox1:ox2], out=acc)
+        np.right_shift(acc, 8, out=tmp)
+        np.add(acc, tmp, out=acc)
+        np.right_shift(acc, 8, out=acc)
+        np.copyto(roi, acc, casting='unsafe')
+        return frame
+
+
+def overlay_with_alpha(background_img, overlay, x, y):
+    if not isinstance(overlay, PremultipliedOverlay):
+        overlay = PremultipliedOverlay(overlay)
+    return overlay.blend_into(background_img, x, y)
+
+
+def _reference_overlay_with_alpha(background_img, overlay_img, x, y):
+    # Implementação original em float64, mantida só para o benchmark
+    h_overlay, w_overlay, _ = overlay_img.shape
+    h_bg, w_bg, _ = background_img.shape
+    x, y = int(x), int(y)
+    y1, y2 = max(0, y), min(y + h_overlay, h_bg)
+    x1, x2 = max(0, x), min(x + w_overlay, w_bg)
+    roi_bg = background_img[y1:y2, x1:x2]
+    roi_h, roi_w = roi_bg.shape[:2]
+    if roi_h > 0 and roi_w > 0:
+        overlay_cropped = overlay_img[:roi_h, :roi_w]
+        alpha = overlay_cropped[:, :, 3] / 255.0
+        overlay_rgb = overlay_cropped[:, :, :3]
+        for c in range(0, 3):
+            roi_bg[:, :, c] = (overlay_rgb[:, :, c] * alpha) + (roi_bg[:, :, c] * (1.0 - alpha))
+    return background_img
+
+
+def _benchmark(iterations=500):
+    import time
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    overlay = rng.integers(0, 256, (150, 150, 4), dtype=np.uint8)
+    overlay[:30, :, 3] = 0
+    overlay[-30:, :, 3] = 255
+    prepared = PremultipliedOverlay(overlay)
+
+    # A versão antiga desalinha o overlay quando ele sai pela esquerda/topo,
+    # então a comparação usa apenas posições internas e bordas direita/inferior.
+    positions = [(100, 100), (0, 0), (560, 400), (600, 300), (250, 420)]
+    max_diff = 0
+    for x, y in positions:
+        expected = _reference_overlay_with_alpha(frame.copy(), overlay, x, y)
+        actual = prepared.blend_into(frame.copy(), x, y)
+        max_diff = max(max_diff, int(np.abs(expected.astype(np.int16) - actual.astype(np.int16)).max()))
+    assert max_diff <= 1, f"Diferença máxima de {max_diff} LSB"
+
+    target = frame.copy()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _reference_overlay_with_alpha(target, overlay, 245, 165)
+    reference_ms = (time.perf_counter() - start) * 1000 / iterations
+
+    target = frame.copy()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        prepared.blend_into(target, 245, 165)
+    fast_ms = (time.perf_counter() - start) * 1000 / iterations
+
+    print(f"Diferença máxima: {max_diff} LSB")
+    print(f"overlay_with_alpha (float64): {reference_ms:.3f} ms/frame")
+    print(f"PremultipliedOverlay (uint16): {fast_ms:.3f} ms/frame ({reference_ms / fast_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,268 @@
+import atexit
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter, deque
+
+KINDS = {"game_start": 1, "answer": 2, "ar_reward": 3, "game_over": 4, "game_completed": 5}
+# Tempos de resposta em buckets logarítmicos de 10%: a mediana sai do
+# histograma com erro de ~5%, sem guardar nem ordenar os tempos
+TIME_BUCKET_BASE = 1.1
+
+
+def time_bucket(ms):
+    return int(math.log(max(ms, 1.0), TIME_BUCKET_BASE))
+
+
+def bucket_value(bucket):
+    return TIME_BUCKET_BASE ** (bucket + 0.5)
+
+
+class GameEventLog:
+    # Log das jogadas (respostas, tempos, AR) em SQLite. record() só faz um
+    # append num deque, então pode ser chamado do handler do Flet; uma thread
+    # grava os eventos em lote (uma transação por lote) e, na mesma transação,
+    # atualiza as tabelas de agregados, que respondem às consultas de
+    # acerto/tempo/conclusão sem varrer os eventos.
+    def __init__(self, path="events.db", batch_size=512, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._question_ids = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY,
+                question_key TEXT NOT NULL UNIQUE,
+                question TEXT NOT NULL,
+                difficulty TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                created_at REAL NOT NULL,
+                game_id INTEGER NOT NULL,
+                kind INTEGER NOT NULL,
+                difficulty TEXT,
+                question_id INTEGER REFERENCES questions(id),
+                answer TEXT,
+                correct INTEGER,
+                answer_ms INTEGER,
+                score INTEGER,
+                ar_fps REAL,
+                ar_frames INTEGER,
+                ar_dropped INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS question_stats (
+                question_id INTEGER PRIMARY KEY REFERENCES questions(id),
+                answers INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                total_ms INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS answer_time_histogram (
+                question_id INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (question_id, bucket)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS difficulty_stats (
+                difficulty TEXT PRIMARY KEY,
+                started INTEGER NOT NULL,
+                completed INTEGER NOT NULL,
+                game_over INTEGER NOT NULL
+            );
+        """)
+        self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def new_game_id():
+        return uuid.uuid4().int >> 65
+
+    def record(self, kind, game_id, difficulty=None, question=None, answer=None, correct=None,
+               answer_ms=None, score=None, ar_stats=None):
+        ar_stats = ar_stats or {}
+        self._buffer.append((time.time(), game_id, KINDS[kind], difficulty, question, answer, correct,
+                             None if answer_ms is None else int(answer_ms), score,
+                             ar_stats.get("fps"), ar_stats.get("frames"), ar_stats.get("dropped")))
+        if len(self._buffer) >= self.batch_size: self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                while self.flush(): pass
+            except sqlite3.Error as e: print(f"Erro ao gravar eventos do jogo: {e}")
+
+    def _question_id(self, question, new_ids):
+        # Ids novos ficam em new_ids até o commit: se a transação voltar atrás,
+        # o cache não pode apontar para linhas que não existem
+        key = question.get("id") or question["question"]
+        question_id = self._question_ids.get(key) or new_ids.get(key)
+        if question_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO questions (question_key, question, difficulty) VALUES (?, ?, ?)",
+                               (key, question["question"], question["difficulty"]))
+            question_id = self._conn.execute("SELECT id FROM questions WHERE question_key = ?", (key,)).fetchone()[0]
+            new_ids[key] = question_id
+        return question_id
+
+    def flush(self):
+        # Grava um lote do buffer; devolve quantos eventos foram gravados. Se a
+        # gravação falhar, o lote volta para o início do buffer.
+        with self._lock:
+            batch = []
+            while self._buffer and len(batch) < self.batch_size * 8: batch.append(self._buffer.popleft())
+            if not batch: return 0
+            new_ids = {}
+            try:
+                self._write_batch(batch, new_ids)
+            except sqlite3.Error:
+                self._buffer.extendleft(reversed(batch))
+                raise
+            self._question_ids.update(new_ids)
+            return len(batch)
+
+    def _write_batch(self, batch, new_ids):
+        rows = []
+        question_stats = {}
+        histogram = Counter()
+        difficulty_stats = {}
+        with self._conn:
+            for event in batch:
+                created_at, game_id, kind, difficulty, question, answer, correct, answer_ms, score, ar_fps, ar_frames, ar_dropped = event
+                question_id = self._question_id(question, new_ids) if question else None
+                rows.append((created_at, game_id, kind, difficulty, question_id, answer,
+                             None if correct is None else int(correct), answer_ms, score, ar_fps, ar_frames, ar_dropped))
+                if kind == KINDS["answer"] and question_id is not None and answer_ms is not None:
+                    stats = question_stats.setdefault(question_id, [0, 0, 0])
+                    stats[0] += 1; stats[1] += int(bool(correct)); stats[2] += answer_ms
+                    histogram[(question_id, time_bucket(answer_ms))] += 1
+                elif kind in (KINDS["game_start"], KINDS["game_completed"], KINDS["game_over"]) and difficulty:
+                    stats = difficulty_stats.setdefault(difficulty, [0, 0, 0])
+                    stats[(KINDS["game_start"], KINDS["game_completed"], KINDS["game_over"]).index(kind)] += 1
+            self._conn.executemany(
+                "INSERT INTO events (created_at, game_id, kind, difficulty, question_id, answer, correct, answer_ms, "
+                "score, ar_fps, ar_frames, ar_dropped) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany(
+                "INSERT INTO question_stats VALUES (?, ?, ?, ?) ON CONFLICT(question_id) DO UPDATE SET "
+                "answers = answers + excluded.answers, correct = correct + excluded.correct, total_ms = total_ms + excluded.total_ms",
+                ((question_id, *stats) for question_id, stats in question_stats.items()))
+            self._conn.executemany(
+                "INSERT INTO answer_time_histogram VALUES (?, ?, ?) ON CONFLICT(question_id, bucket) DO UPDATE SET "
+                "count = count + excluded.count",
+                ((question_id, bucket, count) for (question_id, bucket), count in histogram.items()))
+            self._conn.executemany(
+                "INSERT INTO difficulty_stats VALUES (?, ?, ?, ?) ON CONFLICT(difficulty) DO UPDATE SET "
+                "started = started + excluded.started, completed = completed + excluded.completed, "
+                "game_over = game_over + excluded.game_over",
+                ((difficulty, *stats) for difficulty, stats in difficulty_stats.items()))
+
+    def question_stats(self, difficulty=None, min_answers=1):
+        # Acerto e mediana do tempo de resposta por pergunta, das mais difíceis
+        # (menor taxa de acerto) para as mais fáceis
+        where, params = "WHERE s.answers >= ?", [min_answers]
+        if difficulty: where, params = where + " AND q.difficulty = ?", params + [difficulty]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT q.id, q.question, q.difficulty, s.answers, s.correct, s.total_ms FROM question_stats s "
+                f"JOIN questions q ON q.id = s.question_id {where}", params).fetchall()
+            histograms = {}
+            for question_id, bucket, count in self._conn.execute(
+                    "SELECT h.question_id, h.bucket, h.count FROM answer_time_histogram h "
+                    "JOIN question_stats s ON s.question_id = h.question_id JOIN questions q ON q.id = h.question_id "
+                    f"{where} ORDER BY h.question_id, h.bucket", params):
+                histograms.setdefault(question_id, []).append((bucket, count))
+        stats = []
+        for question_id, question, question_difficulty, answers, correct, total_ms in rows:
+            stats.append({
+                "question": question, "difficulty": question_difficulty, "answers": answers,
+                "accuracy": correct / answers, "mean_answer_ms": total_ms / answers,
+                "median_answer_ms": _histogram_median(histograms.get(question_id, []), answers),
+            })
+        return sorted(stats, key=lambda s: s["accuracy"])
+
+    def difficulty_stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT difficulty, started, completed, game_over FROM difficulty_stats").fetchall()
+        return {difficulty: {"started": started, "completed": completed, "game_over": game_over,
+                             "completion_rate": completed / started if started else 0.0}
+                for difficulty, started, completed, game_over in rows}
+
+    def close(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join()
+        try:
+            while self.flush(): pass
+        except sqlite3.Error as e: print(f"Erro ao gravar eventos do jogo: {len(self._buffer)} eventos perdidos ({e})")
+        with self._lock: self._conn.close()
+
+
+def _histogram_median(buckets, total):
+    cumulative = 0
+    for bucket, count in buckets:
+        cumulative += count
+        if cumulative * 2 >= total: return round(bucket_value(bucket))
+    return None
+
+
+_default_log = None
+_default_lock = threading.Lock()
+
+
+def default_event_log():
+    # Um único log (e uma única thread de escrita) para todas as sessões
+    global _default_log
+    with _default_lock:
+        if _default_log is None:
+            _default_log = GameEventLog()
+            atexit.register(_default_log.close)
+        return _default_log
+
+
+def _benchmark(events=1_000_000, questions=2_000):
+    import os
+    import random
+    import shutil
+    import tempfile
+    directory = tempfile.mkdtemp()
+    try:
+        log = GameEventLog(os.path.join(directory, "bench.db"), batch_size=4096)
+        bank = [{"id": f"q{i}", "question": f"Pergunta {i}", "difficulty": random.choice(("facil", "medio", "dificil"))}
+                for i in range(questions)]
+        start = time.perf_counter()
+        for i in range(events // 10):
+            game_id = log.new_game_id()
+            difficulty = random.choice(("facil", "medio", "dificil"))
+            log.record("game_start", game_id, difficulty=difficulty)
+            for _ in range(8):
+                log.record("answer", game_id, difficulty=difficulty, question=random.choice(bank), answer="x",
+                           correct=random.random() < 0.7, answer_ms=random.lognormvariate(8, 0.5))
+            log.record("game_completed" if random.random() < 0.6 else "game_over", game_id, difficulty=difficulty, score=30)
+        record_us = (time.perf_counter() - start) * 1e6 / events
+        while log.flush(): pass
+        total = time.perf_counter() - start
+        print(f"{events} eventos: record() {record_us:.2f} µs/evento, gravados em {total:.1f} s "
+              f"({events / total:,.0f} eventos/s)")
+        start = time.perf_counter()
+        stats = log.question_stats()
+        print(f"question_stats() ({len(stats)} perguntas): {(time.perf_counter() - start) * 1000:.1f} ms")
+        start = time.perf_counter()
+        log.difficulty_stats()
+        print(f"difficulty_stats(): {(time.perf_counter() - start) * 1000:.2f} ms")
+        log.close()
+        print(f"Tamanho do banco: {os.path.getsize(os.path.join(directory, 'bench.db')) / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    _benchmark()
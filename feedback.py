@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FeedbackScheduler:
+    # Agenda os atrasos de feedback do quiz sem bloquear o handler do Flet.
+    # Um único event loop (compartilhado por todas as sessões) só conta o tempo;
+    # o callback roda depois num pool pequeno, então nenhuma thread fica dormindo.
+    # Callbacks que podem demorar (esperar o AR carregar, abrir a câmera) vão
+    # com call_later_blocking() para um pool separado e maior, para uma sessão
+    # lenta não atrasar o feedback das outras.
+    def __init__(self, max_workers=4, max_blocking_workers=32):
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quiz-feedback")
+        self._blocking_executor = ThreadPoolExecutor(max_workers=max_blocking_workers, thread_name_prefix="quiz-feedback-blocking")
+        # Atraso de cada callback em relação ao horário agendado (espera na fila do pool)
+        self.lateness = deque(maxlen=10_000)
+        threading.Thread(target=self._loop.run_forever, name="quiz-feedback-timer", daemon=True).start()
+
+    def call_later(self, delay, callback, *args):
+        self._schedule(self._executor, delay, callback, args)
+
+    def call_later_blocking(self, delay, callback, *args):
+        self._schedule(self._blocking_executor, delay, callback, args)
+
+    def _schedule(self, executor, delay, callback, args):
+        due = time.perf_counter() + delay
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, executor.submit, self._run, callback, args, due)
+
+    def _run(self, callback, args, due):
+        self.lateness.append(time.perf_counter() - due)
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Erro no feedback agendado: {e}")
+
+
+class BlockingScheduler:
+    # Comportamento antigo (time.sleep dentro do handler), usado só para comparação
+    def __init__(self):
+        self.lateness = deque(maxlen=10_000)
+
+    def call_later(self, delay, callback, *args):
+        due = time.perf_counter() + delay
+        time.sleep(delay)
+        self.lateness.append(time.perf_counter() - due)
+        callback(*args)
+
+    call_later_blocking = call_later
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler():
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None: _default_scheduler = FeedbackScheduler()
+        return _default_scheduler
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def _load_test(sessions=40, questions=4, handler_workers=8, blocking=False, camera_open_seconds=1.0):
+    # Simula N sessões clicando nas respostas ao mesmo tempo, com um pool de
+    # handlers do tamanho do pool de threads do Flet, e mede a latência de cada
+    # clique (do clique até o handler retornar) e quanto cada callback agendado
+    # esperou além do horário. Abrir a câmera do AR leva camera_open_seconds.
+    import os
+    import random
+    import shutil
+    import tempfile
+    from types import SimpleNamespace
+
+    import flet as ft
+    from quiz import QuizManager
+    from event_log import GameEventLog
+    from score_store import JsonScoreStore
+
+    class FakePage(SimpleNamespace):
+        def update(self): pass
+
+    class FakeCameraApp:
+        stack = ft.Stack()
+        def set_overlay_image(self, image_filename): return True
+        def start(self):
+            time.sleep(camera_open_seconds)
+            return True
+        def stop(self): pass
+        def session_stats(self): return {}
+
+    scheduler = BlockingScheduler() if blocking else FeedbackScheduler(max_workers=handler_workers)
+    handlers = ThreadPoolExecutor(max_workers=handler_workers)
+    latencies = []
+    latencies_lock = threading.Lock()
+    directory = tempfile.mkdtemp()
+    event_log = GameEventLog(os.path.join(directory, "events.db"))
+
+    def click(button):
+        start = time.perf_counter()
+        future = handlers.submit(button.on_click, SimpleNamespace(control=button))
+        future.add_done_callback(lambda _: record(time.perf_counter() - start))
+
+    def record(latency):
+        with latencies_lock: latencies.append(latency)
+
+    def run_session(index):
+        manager = QuizManager(FakePage(), FakeCameraApp(), score_store=JsonScoreStore(os.path.join(directory, f"s{index}.json")),
+                              questions_per_game=questions, scheduler=scheduler, event_log=event_log)
+        manager.username_field.value = f"jogador{index}"
+        manager.show_difficulty_selection(None)
+        manager.select_difficulty(SimpleNamespace(control=SimpleNamespace(data="facil")))
+        while manager.state != "final":
+            if manager.state == "question":
+                click(random.choice(manager.answer_buttons))
+                # Espera o feedback terminar antes do próximo clique
+                while manager.state == "question": time.sleep(0.005)
+            elif manager.state == "ar_reward":
+                manager.next_question(None)
+            else:
+                time.sleep(0.01)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run_session, args=(i,)) for i in range(sessions)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    total = time.perf_counter() - start
+    handlers.shutdown()
+    event_log.close()
+    shutil.rmtree(directory, ignore_errors=True)
+    mode = "bloqueante (time.sleep)" if blocking else "agendado (FeedbackScheduler)"
+    print(f"{mode}: {sessions} sessões, {len(latencies)} cliques em {total:.1f} s | latência do handler "
+          f"p50={_percentile(latencies, 0.5) * 1000:.1f} ms p95={_percentile(latencies, 0.95) * 1000:.1f} ms "
+          f"p99={_percentile(latencies, 0.99) * 1000:.1f} ms max={max(latencies) * 1000:.1f} ms")
+    lateness = list(scheduler.lateness)
+    print(f"  atraso dos callbacks agendados: p50={_percentile(lateness, 0.5) * 1000:.1f} ms "
+          f"p95={_percentile(lateness, 0.95) * 1000:.1f} ms p99={_percentile(lateness, 0.99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    _load_test(blocking=True)
+    _load_test(blocking=False)
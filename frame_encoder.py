@@ -0,0 +1,109 @@
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+except ImportError:
+    TurboJPEG = None
+
+
+class AdaptiveFrameEncoder:
+    # Codifica frames em JPEG com tamanho e qualidade configuráveis, pula frames
+    # quase idênticos ao último enviado e ajusta a qualidade para caber num
+    # orçamento de bytes e/ou de tempo por frame.
+    def __init__(self, max_width=640, quality=80, min_quality=35, max_quality=90,
+                 byte_budget=None, time_budget_ms=None, skip_threshold=6,
+                 keyframe_interval=30, use_turbojpeg=True):
+        self.max_width = max_width
+        self.quality = quality
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.byte_budget = byte_budget
+        self.time_budget_ms = time_budget_ms
+        self.skip_threshold = skip_threshold
+        self.keyframe_interval = keyframe_interval
+        self._turbo = None
+        if use_turbojpeg and TurboJPEG is not None:
+            try: self._turbo = TurboJPEG()
+            except Exception as e: print(f"TurboJPEG indisponível, usando OpenCV: {e}")
+        self._last_thumbnail = None
+        self._frames_since_sent = 0
+        self._history = deque(maxlen=120)
+        self.encoded = 0
+        self.skipped = 0
+
+    def prepare(self, frame):
+        h, w = frame.shape[:2]
+        if self.max_width and w > self.max_width:
+            new_h = int(h * self.max_width / w)
+            frame = cv2.resize(frame, (self.max_width, new_h), interpolation=cv2.INTER_AREA)
+        return frame
+
+    def is_nearly_identical(self, frame):
+        # Compara blocos de ~8x8 px (média de cada bloco) e usa a maior
+        # diferença entre eles: um overlay pequeno se mexendo sobre um fundo
+        # parado muda poucos blocos, mas muda muito, e não pode ser descartado
+        if not self.skip_threshold: return False
+        h, w = frame.shape[:2]
+        size = (max(1, w // 8), max(1, h // 8))
+        thumbnail = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), size, interpolation=cv2.INTER_AREA)
+        previous, self._last_thumbnail = self._last_thumbnail, thumbnail
+        if previous is None or previous.shape != thumbnail.shape or self._frames_since_sent >= self.keyframe_interval: return False
+        if int(cv2.absdiff(previous, thumbnail).max()) < self.skip_threshold:
+            # Mantém a referência no último frame enviado, não no descartado
+            self._last_thumbnail = previous
+            return True
+        return False
+
+    def encode(self, frame):
+        # Devolve os bytes JPEG, ou None quando o frame foi descartado
+        return self.encode_prepared(self.prepare(frame))
+
+    def encode_prepared(self, frame):
+        # Mesmo que encode(), para um frame que já passou por prepare()
+        if self.is_nearly_identical(frame):
+            self.skipped += 1
+            self._frames_since_sent += 1
+            return None
+        start = time.perf_counter()
+        if self._turbo is not None:
+            data = self._turbo.encode(frame, quality=self.quality, jpeg_subsample=TJSAMP_420)
+        else:
+            ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality,
+                                                      cv2.IMWRITE_JPEG_OPTIMIZE, 0])
+            if not ok: return None
+            data = buffer.tobytes()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._frames_since_sent = 0
+        self.encoded += 1
+        self._history.append((time.perf_counter(), len(data), elapsed_ms))
+        self._adapt_quality(len(data), elapsed_ms)
+        return data
+
+    def _adapt_quality(self, size, elapsed_ms):
+        over = (self.byte_budget and size > self.byte_budget) or (self.time_budget_ms and elapsed_ms > self.time_budget_ms)
+        if over:
+            self.quality = max(self.min_quality, self.quality - 5)
+            return
+        under_bytes = not self.byte_budget or size < self.byte_budget * 0.8
+        under_time = not self.time_budget_ms or elapsed_ms < self.time_budget_ms * 0.8
+        if (self.byte_budget or self.time_budget_ms) and under_bytes and under_time:
+            self.quality = min(self.max_quality, self.quality + 1)
+
+    def stats(self):
+        history = list(self._history)
+        if not history:
+            return {"bytes_per_second": 0.0, "encode_ms": 0.0, "quality": self.quality,
+                    "encoded": self.encoded, "skipped": self.skipped}
+        elapsed = history[-1][0] - history[0][0]
+        total_bytes = sum(size for _, size, _ in history[1:])
+        return {
+            "bytes_per_second": total_bytes / elapsed if elapsed > 0 else 0.0,
+            "encode_ms": float(np.mean([ms for _, _, ms in history])),
+            "quality": self.quality,
+            "encoded": self.encoded,
+            "skipped": self.skipped,
+        }
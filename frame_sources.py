@@ -0,0 +1,153 @@
+import glob
+import math
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameSource:
+    # Interface de entrada do loop de AR. Tem os mesmos métodos do
+    # CameraSession, então qualquer fonte pode ser passada como `camera=` ao
+    # CameraApp ou usada sem Flet no ar_benchmark.py.
+    def open(self):
+        return True
+
+    def resume(self):
+        return self.open()
+
+    def pause(self):
+        pass
+
+    def read(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None: return
+            yield frame
+
+
+class WebcamSource(FrameSource):
+    def __init__(self, **session_options):
+        from camera_session import CameraSession
+        self.session = CameraSession(**session_options)
+
+    def open(self): return self.session.open()
+    def resume(self): return self.session.resume()
+    def pause(self): self.session.pause()
+    def read(self): return self.session.read()
+    def stats(self): return self.session.stats()
+    def close(self): self.session.close()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, loop=False, max_frames=None):
+        self.path = path
+        self.loop = loop
+        self.max_frames = max_frames
+        self.cap = None
+        self.frames_read = 0
+
+    def open(self):
+        if self.cap is None:
+            self.cap = cv2.VideoCapture(self.path)
+        return self.cap.isOpened()
+
+    def read(self):
+        if not self.open() or (self.max_frames and self.frames_read >= self.max_frames): return None
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret: return None
+        self.frames_read += 1
+        return frame
+
+    def close(self):
+        if self.cap is not None: self.cap.release()
+        self.cap = None
+
+
+class ImageSequenceSource(FrameSource):
+    # Lê imagens de um padrão glob (ex.: "capturas/*.jpg"), decodificando todas
+    # de antemão para a leitura de disco não entrar nas medições
+    def __init__(self, pattern, loop=False, max_frames=None):
+        paths = sorted(glob.glob(pattern)) if isinstance(pattern, str) else list(pattern)
+        self.frames = [frame for frame in (cv2.imread(p, cv2.IMREAD_COLOR) for p in paths) if frame is not None]
+        self.loop = loop
+        self.max_frames = max_frames
+        self.frames_read = 0
+
+    def read(self):
+        if not self.frames or (self.max_frames and self.frames_read >= self.max_frames): return None
+        if self.frames_read >= len(self.frames) and not self.loop: return None
+        frame = self.frames[self.frames_read % len(self.frames)]
+        self.frames_read += 1
+        return frame.copy()
+
+
+class SyntheticSource(FrameSource):
+    # Gera frames com fundo em movimento e N "mãos" (discos claros) em
+    # trajetórias conhecidas. `anchors` tem a posição normalizada de cada mão
+    # no último frame, usada pelo ScriptedDetector no lugar do MediaPipe.
+    def __init__(self, width=640, height=480, hands=1, max_frames=300, fps=None, seed=0):
+        self.width = width
+        self.height = height
+        self.hands = hands
+        self.max_frames = max_frames
+        self.interval = 1.0 / fps if fps else 0.0
+        rng = np.random.default_rng(seed)
+        self._background = rng.integers(0, 256, (height * 2, width * 2, 3), dtype=np.uint8)
+        self._background = cv2.GaussianBlur(self._background, (0, 0), 9)
+        self._phases = rng.uniform(0, 2 * math.pi, size=max(hands, 1))
+        self.frames_read = 0
+        self.anchors = []
+        self._last_read = None
+
+    def read(self):
+        if self.max_frames and self.frames_read >= self.max_frames: return None
+        if self.interval and self._last_read is not None:
+            delay = self._last_read + self.interval - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+        self._last_read = time.perf_counter()
+        i = self.frames_read
+        ox = int((math.sin(i / 40) + 1) / 2 * self.width)
+        oy = int((math.cos(i / 55) + 1) / 2 * self.height)
+        frame = self._background[oy:oy + self.height, ox:ox + self.width].copy()
+        radius = max(8, self.height // 10)
+        self.anchors = []
+        for hand in range(self.hands):
+            phase = self._phases[hand] + i / 30
+            x = 0.5 + 0.35 * math.cos(phase + hand * math.pi)
+            y = 0.5 + 0.3 * math.sin(phase * 1.3)
+            cv2.circle(frame, (int(x * self.width), int(y * self.height)), radius, (180, 200, 230), -1)
+            self.anchors.append((x, y))
+        self.frames_read += 1
+        return frame
+
+
+class ScriptedDetector:
+    # Substitui o HandTracker no benchmark: com a fonte sintética devolve as
+    # posições conhecidas, exercitando o composite com N mãos sem MediaPipe
+    def __init__(self, source):
+        self.source = source
+
+    def process(self, frame_bgr, timestamp=None):
+        return list(getattr(self.source, "anchors", []))
+
+    def reset(self):
+        pass
+
+    def warm_up(self, width=640, height=480):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,156 @@
+import math
+import time
+
+import cv2
+import numpy as np
+
+
+class OneEuroFilter:
+    # Filtro One-Euro (Casiez et al.): suaviza bastante com a mão parada e
+    # reduz o atraso quando ela se move rápido.
+    def __init__(self, min_cutoff=1.2, beta=0.02, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = None
+        self._dx = 0.0
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, t):
+        if self._x is None:
+            self._x, self._t = x, t
+            return x
+        dt = max(t - self._t, 1e-6)
+        dx = (x - self._x) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx = a_d * dx + (1 - a_d) * self._dx
+        cutoff = self.min_cutoff + self.beta * abs(self._dx)
+        a = self._alpha(cutoff, dt)
+        self._x = a * x + (1 - a) * self._x
+        self._t = t
+        return self._x
+
+    def predict(self, t):
+        # Extrapola com a velocidade filtrada nos frames sem inferência
+        if self._x is None: return None
+        return self._x + self._dx * (t - self._t)
+
+
+class _TrackedHand:
+    def __init__(self, min_cutoff, beta):
+        self.filter_x = OneEuroFilter(min_cutoff, beta)
+        self.filter_y = OneEuroFilter(min_cutoff, beta)
+        self.position = None
+
+    def update(self, x, y, t):
+        self.position = (self.filter_x(x, t), self.filter_y(y, t))
+        return self.position
+
+    def predict(self, t):
+        return (self.filter_x.predict(t), self.filter_y.predict(t))
+
+
+class AnchorSmoother:
+    # Mantém um filtro One-Euro por mão entre uma detecção e outra
+    def __init__(self, enabled=True, min_cutoff=1.2, beta=0.02):
+        self.enabled = enabled
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self._tracked = []
+
+    def reset(self):
+        self._tracked = []
+
+    def update(self, anchors, t):
+        if not self.enabled:
+            self._tracked = []
+            for x, y in anchors:
+                hand = _TrackedHand(self.min_cutoff, self.beta)
+                hand.position = (x, y)
+                self._tracked.append(hand)
+            return list(anchors)
+        self._tracked = self._match(anchors)
+        return [hand.update(x, y, t) for hand, (x, y) in zip(self._tracked, anchors)]
+
+    def predict(self, t):
+        if not self.enabled: return [hand.position for hand in self._tracked]
+        return [hand.predict(t) for hand in self._tracked]
+
+    def _match(self, anchors):
+        # Associa cada detecção à mão rastreada mais próxima para manter o filtro
+        available = list(self._tracked)
+        matched = []
+        for x, y in anchors:
+            best = None
+            if available:
+                best = min(available, key=lambda hand: (hand.position[0] - x) ** 2 + (hand.position[1] - y) ** 2)
+                if (best.position[0] - x) ** 2 + (best.position[1] - y) ** 2 > 0.04:
+                    best = None
+            if best is None:
+                best = _TrackedHand(self.min_cutoff, self.beta)
+            else:
+                available.remove(best)
+            matched.append(best)
+        return matched
+
+
+class HandTracker:
+    # Encapsula o MediaPipe Hands devolvendo só o ponto de ancoragem de cada mão
+    # (meio entre o pulso e o MIDDLE_FINGER_MCP), normalizado entre 0 e 1.
+    # A inferência roda num frame reduzido e, com detect_every > 1, só a cada N
+    # frames; nos intermediários a posição é extrapolada pelo filtro.
+    name = "mediapipe"
+
+    def __init__(self, inference_width=320, detect_every=2, model_complexity=0, max_num_hands=2,
+                 min_detection_confidence=0.7, min_tracking_confidence=0.5,
+                 smoothing=True, min_cutoff=1.2, beta=0.02):
+        # Import aqui para o AnchorSmoother (e os outros detectores) funcionarem sem o MediaPipe
+        import mediapipe as mp
+        self.mp_hands = mp.solutions.hands
+        self.hands = self.mp_hands.Hands(
+            model_complexity=model_complexity, max_num_hands=max_num_hands,
+            min_detection_confidence=min_detection_confidence, min_tracking_confidence=min_tracking_confidence
+        )
+        self.inference_width = inference_width
+        self.detect_every = max(1, detect_every)
+        self.smoother = AnchorSmoother(smoothing, min_cutoff, beta)
+        self._frame_count = 0
+
+    def reset(self):
+        self.smoother.reset()
+        self._frame_count = 0
+
+    def close(self):
+        self.hands.close()
+
+    def warm_up(self, width=640, height=480):
+        # Uma inferência em frame vazio força a inicialização do grafo do MediaPipe
+        self.detect(np.zeros((height, width, 3), dtype=np.uint8))
+        self.reset()
+
+    def detect(self, frame_bgr):
+        h, w = frame_bgr.shape[:2]
+        if self.inference_width and w > self.inference_width:
+            small_h = int(h * self.inference_width / w)
+            frame_bgr = cv2.resize(frame_bgr, (self.inference_width, small_h), interpolation=cv2.INTER_AREA)
+        rgb_frame = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+        results = self.hands.process(rgb_frame)
+        anchors = []
+        if results.multi_hand_landmarks:
+            for hand_landmarks in results.multi_hand_landmarks:
+                wrist = hand_landmarks.landmark[self.mp_hands.HandLandmark.WRIST]
+                middle_finger_mcp = hand_landmarks.landmark[self.mp_hands.HandLandmark.MIDDLE_FINGER_MCP]
+                anchors.append(((wrist.x + middle_finger_mcp.x) / 2, (wrist.y + middle_finger_mcp.y) / 2))
+        return anchors
+
+    def process(self, frame_bgr, timestamp=None):
+        t = time.perf_counter() if timestamp is None else timestamp
+        run_detection = self._frame_count % self.detect_every == 0
+        self._frame_count += 1
+        if not run_detection: return self.smoother.predict(t)
+        return self.smoother.update(self.detect(frame_bgr), t)
@@ -0,0 +1,402 @@
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from hand_tracking import AnchorSmoother, HandTracker
+
+
+def mediapipe_detector():
+    # Fábrica padrão dos workers: um grafo do MediaPipe por processo
+    tracker = HandTracker(inference_width=None, detect_every=1, smoothing=False)
+    tracker.warm_up(320, 240)
+    return tracker.detect
+
+
+def _worker_main(worker_id, detector_factory, requests, results, max_attached=64):
+    try:
+        detect = detector_factory()
+    except Exception as e:
+        results.put(("failed", worker_id, f"{type(e).__name__}: {e}"))
+        return
+    results.put(("ready", worker_id, None))
+    buffers = OrderedDict()
+    while True:
+        request = requests.get()
+        if request is None: break
+        session_id, shm_name, buffer_index, sequence, shape = request
+        if shm_name not in buffers:
+            # Anexa ao bloco compartilhado da sessão só uma vez por worker e
+            # solta os blocos menos usados (sessões que provavelmente já fecharam)
+            buffers[shm_name] = shared_memory.SharedMemory(name=shm_name)
+            while len(buffers) > max_attached: buffers.popitem(last=False)[1].close()
+        buffers.move_to_end(shm_name)
+        shm = buffers[shm_name]
+        frame_size = shape[0] * shape[1] * 3
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=buffer_index * frame_size)
+        start = time.perf_counter()
+        try:
+            anchors = detect(frame)
+        except Exception as e:
+            print(f"Erro no worker de inferência: {e}")
+            anchors = []
+        results.put(("result", worker_id, (session_id, buffer_index, sequence, anchors, time.perf_counter() - start)))
+    for shm in buffers.values(): shm.close()
+
+
+class InferenceSession:
+    # Cada sessão tem um bloco de memória compartilhada com dois buffers: um
+    # pode estar em uso por um worker enquanto o outro recebe o próximo frame.
+    # Um frame novo sobrescreve o pendente ainda não despachado (frame velho
+    # é descartado em vez de enfileirado). A cópia para o buffer acontece fora
+    # do lock do serviço: o buffer fica marcado em `writing` até o frame ser
+    # publicado como pendente.
+    def __init__(self, service, session_id, frame_width, frame_height):
+        self.service = service
+        self.session_id = session_id
+        self.shape = (frame_height, frame_width, 3)
+        frame_size = frame_height * frame_width * 3
+        self._shm = shared_memory.SharedMemory(create=True, size=frame_size * 2)
+        self._frames = [np.ndarray(self.shape, dtype=np.uint8, buffer=self._shm.buf, offset=i * frame_size) for i in range(2)]
+        self._sequence = itertools.count(1)
+        self.pending = None
+        self.in_flight = None
+        self.writing = None
+        self.submitted_at = {}
+        self.latest = (0, [], None)
+        self.result_event = threading.Event()
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.error = None
+        self.closed = False
+
+    @property
+    def shm_name(self):
+        return self._shm.name
+
+    def submit(self, frame_bgr):
+        with self.service._lock:
+            if self.closed or self.error or self.writing is not None: return None
+            buffer_index = 1 - self.in_flight[0] if self.in_flight else 0
+            # O pendente antigo sai da fila antes da escrita, para o despacho não pegá-lo no meio da cópia
+            if self.pending: self.dropped += 1
+            self.pending = None
+            self.writing = buffer_index
+            target = self._frames[buffer_index]
+        if frame_bgr.shape == self.shape: np.copyto(target, frame_bgr)
+        else: cv2.resize(frame_bgr, (self.shape[1], self.shape[0]), dst=target, interpolation=cv2.INTER_AREA)
+        with self.service._lock:
+            self.writing = None
+            if self.closed:
+                self.service._release_if_idle(self)
+                return None
+            sequence = next(self._sequence)
+            self.pending = (buffer_index, sequence)
+            self.submitted_at[sequence] = time.perf_counter()
+            self.submitted += 1
+            self.service._work_available.notify()
+            return sequence
+
+    def close(self):
+        self.service._close_session(self)
+
+    def _release(self):
+        if not self._frames: return
+        self._frames = []
+        self._shm.close()
+        self._shm.unlink()
+
+
+class HandInferenceService:
+    # Pool de processos com um MediaPipe Hands por worker, compartilhado por
+    # todas as sessões (clientes web). Os frames vão por memória compartilhada,
+    # sem pickle; o despacho é round-robin entre sessões com frame pendente e
+    # cada sessão tem no máximo um frame em processamento. Cada worker tem a
+    # própria fila, então o serviço sabe o que cada um está processando: um
+    # worker que morre é reiniciado (até max_restarts vezes) e o frame dele é
+    # descartado. Se nenhum worker sobrar, o erro vai para todas as sessões.
+    def __init__(self, workers=None, frame_width=320, frame_height=240, detector_factory=mediapipe_detector,
+                 max_restarts=3, health_interval=0.5):
+        self.workers = workers or os.cpu_count() or 1
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.detector_factory = detector_factory
+        self._context = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._sessions = {}
+        self._closing = {}
+        self._round_robin = []
+        self._next_session = 0
+        self.max_restarts = max_restarts
+        self.health_interval = health_interval
+        self._idle_workers = []
+        self._busy_workers = {}
+        self._worker_state = {}
+        self._restarts = {}
+        self._session_ids = itertools.count(1)
+        self._processes = []
+        self._queues = []
+        self._threads = []
+        self.error = None
+        self._last_failure = None
+        self.is_running = False
+
+    def start(self):
+        if self.is_running: return self
+        self.is_running = True
+        self.error = None
+        self._results = self._context.Queue()
+        self._queues = [self._context.Queue() for _ in range(self.workers)]
+        self._processes = [None] * self.workers
+        self._restarts = {worker_id: 0 for worker_id in range(self.workers)}
+        for worker_id in range(self.workers): self._spawn(worker_id)
+        self._threads = [threading.Thread(target=self._dispatch_loop, name="inference-dispatch", daemon=True),
+                         threading.Thread(target=self._result_loop, name="inference-results", daemon=True)]
+        for t in self._threads: t.start()
+        return self
+
+    def _spawn(self, worker_id):
+        # O worker só entra em _idle_workers quando avisa que o detector carregou
+        self._worker_state[worker_id] = "starting"
+        process = self._context.Process(target=_worker_main, daemon=True,
+                                        args=(worker_id, self.detector_factory, self._queues[worker_id], self._results))
+        process.start()
+        self._processes[worker_id] = process
+
+    def _check_workers(self):
+        # Chamado com self._lock
+        for worker_id, process in enumerate(self._processes):
+            state = self._worker_state[worker_id]
+            if state not in ("starting", "ready") or process.is_alive(): continue
+            self._last_failure = f"worker {worker_id} terminou com código {process.exitcode}"
+            print(f"Worker de inferência {worker_id} terminou inesperadamente (código {process.exitcode}).")
+            if worker_id in self._idle_workers: self._idle_workers.remove(worker_id)
+            session = self._busy_workers.pop(worker_id, None)
+            if session is not None: self._frame_lost(session)
+            if self._restarts[worker_id] < self.max_restarts:
+                self._restarts[worker_id] += 1
+                self._queues[worker_id] = self._context.Queue()
+                self._spawn(worker_id)
+            else:
+                self._worker_state[worker_id] = "dead"
+        self._check_failed()
+
+    def _frame_lost(self, session):
+        session.in_flight = None
+        session.dropped += 1
+        self._release_if_idle(session)
+        self._work_available.notify()
+
+    def _check_failed(self):
+        if self.error or any(state in ("starting", "ready") for state in self._worker_state.values()): return
+        self.error = f"Nenhum worker de inferência disponível ({self._last_failure})."
+        print(f"Erro no serviço de inferência: {self.error}")
+        for session in self._sessions.values():
+            session.error = self.error
+            session.result_event.set()
+
+    def open_session(self):
+        session = InferenceSession(self, next(self._session_ids), self.frame_width, self.frame_height)
+        session.error = self.error
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._round_robin.append(session)
+        return session
+
+    def _close_session(self, session):
+        with self._lock:
+            if session.closed: return
+            session.closed = True
+            self._sessions.pop(session.session_id, None)
+            self._round_robin.remove(session)
+            # Se um worker ainda está lendo o buffer (ou submit() escrevendo),
+            # libera quando o resultado chegar (ou a escrita terminar)
+            self._closing[session.session_id] = session
+            self._release_if_idle(session)
+
+    def _release_if_idle(self, session):
+        # Chamado com self._lock
+        if session.closed and session.in_flight is None and session.writing is None:
+            self._closing.pop(session.session_id, None)
+            session._release()
+
+    def _next_ready_session(self):
+        count = len(self._round_robin)
+        for offset in range(count):
+            session = self._round_robin[(self._next_session + offset) % count]
+            if session.pending and session.in_flight is None:
+                self._next_session = (self._next_session + offset + 1) % count
+                return session
+        return None
+
+    def _dispatch_loop(self):
+        while self.is_running:
+            with self._work_available:
+                session = self._next_ready_session() if self._idle_workers else None
+                while self.is_running and session is None:
+                    self._work_available.wait(0.1)
+                    session = self._next_ready_session() if self._idle_workers else None
+                if session is None: break
+                session.in_flight, session.pending = session.pending, None
+                worker_id = self._idle_workers.pop()
+                self._busy_workers[worker_id] = session
+                buffer_index, sequence = session.in_flight
+                queue = self._queues[worker_id]
+            queue.put((session.session_id, session.shm_name, buffer_index, sequence, session.shape))
+
+    def _result_loop(self):
+        next_check = time.perf_counter() + self.health_interval
+        while self.is_running:
+            if time.perf_counter() >= next_check:
+                with self._lock: self._check_workers()
+                next_check = time.perf_counter() + self.health_interval
+            try:
+                kind, worker_id, message = self._results.get(timeout=0.1)
+            except Exception:
+                continue
+            if kind != "result":
+                with self._lock: self._worker_event(kind, worker_id, message)
+                continue
+            session_id, buffer_index, sequence, anchors, inference_seconds = message
+            with self._lock:
+                if self._busy_workers.pop(worker_id, None) is None: continue
+                self._idle_workers.append(worker_id)
+                session = self._sessions.get(session_id)
+                if session is None:
+                    closed = self._closing.get(session_id)
+                    if closed:
+                        closed.in_flight = None
+                        self._release_if_idle(closed)
+                    self._work_available.notify()
+                    continue
+                session.in_flight = None
+                submitted_at = session.submitted_at.pop(sequence, None)
+                for old in [s for s in session.submitted_at if s < sequence]: session.submitted_at.pop(old)
+                latency = time.perf_counter() - submitted_at if submitted_at else None
+                session.latest = (sequence, anchors, latency)
+                session.completed += 1
+                session.result_event.set()
+                self._work_available.notify()
+
+    def _worker_event(self, kind, worker_id, message):
+        if kind == "ready":
+            self._worker_state[worker_id] = "ready"
+            self._idle_workers.append(worker_id)
+            self._work_available.notify()
+        elif kind == "failed":
+            # O detector não carregou (ex.: MediaPipe ausente): reiniciar não adianta
+            self._last_failure = message
+            print(f"Worker de inferência {worker_id} falhou ao iniciar: {message}")
+            self._worker_state[worker_id] = "failed"
+            self._check_failed()
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            alive = sum(state == "ready" for state in self._worker_state.values())
+        return {
+            "workers": self.workers,
+            "workers_ready": alive,
+            "error": self.error,
+            "sessions": len(sessions),
+            "submitted": sum(s.submitted for s in sessions),
+            "completed": sum(s.completed for s in sessions),
+            "dropped": sum(s.dropped for s in sessions),
+        }
+
+    def stop(self):
+        if not self.is_running: return
+        self.is_running = False
+        with self._work_available: self._work_available.notify_all()
+        for t in self._threads: t.join()
+        for queue in self._queues: queue.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive(): process.terminate()
+        with self._lock:
+            for session in list(self._sessions.values()) + list(self._closing.values()):
+                session.closed = True
+                session._release()
+            self._sessions.clear()
+            self._closing.clear()
+            self._round_robin.clear()
+
+
+class SharedHandTracker:
+    # Mesma interface do HandTracker (process/reset/warm_up), mas a inferência
+    # acontece no HandInferenceService. Como o resultado chega de forma
+    # assíncrona, os frames sem resposta nova usam a posição extrapolada.
+    def __init__(self, service, smoothing=True, min_cutoff=1.2, beta=0.02):
+        self.service = service
+        self.session = service.open_session()
+        self.smoother = AnchorSmoother(smoothing, min_cutoff, beta)
+        self.mp_hands = None
+        self.hands = None
+        self._last_sequence = 0
+        self._error_reported = False
+
+    def reset(self):
+        self.smoother.reset()
+
+    def warm_up(self, width=640, height=480):
+        pass
+
+    def close(self):
+        self.session.close()
+
+    def process(self, frame_bgr, timestamp=None):
+        t = time.perf_counter() if timestamp is None else timestamp
+        if self.session.error:
+            if not self._error_reported:
+                print(f"Inferência compartilhada indisponível: {self.session.error}")
+                self._error_reported = True
+            return []
+        self.session.submit(frame_bgr)
+        sequence, anchors, _ = self.session.latest
+        if sequence == self._last_sequence: return self.smoother.predict(t)
+        self._last_sequence = sequence
+        return self.smoother.update(anchors, t)
+
+
+def _benchmark(sessions=8, seconds=5.0, detector_factory=mediapipe_detector):
+    # Mede a vazão total (inferências/s) com 1, 2, 4... workers, cada sessão
+    # enviando frames sintéticos o mais rápido que o serviço aceita.
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(4)]
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for workers in [w for w in worker_counts if w <= (os.cpu_count() or 1)]:
+        service = HandInferenceService(workers=workers, detector_factory=detector_factory).start()
+        clients = [service.open_session() for _ in range(sessions)]
+        stop_at = time.perf_counter() + seconds
+        warmup_done = time.perf_counter() + min(2.0, seconds / 2)
+
+        def client_loop(session):
+            i = 0
+            while time.perf_counter() < stop_at:
+                session.submit(frames[i % len(frames)])
+                session.result_event.wait(0.05)
+                session.result_event.clear()
+                i += 1
+
+        threads = [threading.Thread(target=client_loop, args=(c,)) for c in clients]
+        for t in threads: t.start()
+        while time.perf_counter() < warmup_done: time.sleep(0.01)
+        completed_start, measure_start = service.stats()["completed"], time.perf_counter()
+        for t in threads: t.join()
+        stats = service.stats()
+        elapsed = time.perf_counter() - measure_start
+        print(f"{workers} worker(s): {(stats['completed'] - completed_start) / elapsed:.1f} inferências/s "
+              f"({sessions} sessões, {stats['dropped']} frames velhos descartados)")
+        service.stop()
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,281 @@
+import bisect
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+# Limites dos buckets em segundos (0,25 ms a ~0,5 s), escala logarítmica
+TIME_BUCKETS = tuple(0.00025 * 2 ** i for i in range(12))
+SIZE_BUCKETS = tuple(1024 * 2 ** i for i in range(10))
+# Threads amostradas pelo profiler "sampling": as do pipeline e o loop sequencial
+SAMPLED_THREADS = ("pipeline-", "camera-loop")
+# Topos de pilha de uma thread parada esperando (frame, fila, timer): não contam
+IDLE_FILES = ("threading.py", "queue.py")
+IDLE_FRAMES = {("pipeline.py", "wait"), ("pipeline.py", "get")}
+
+
+class RollingHistogram:
+    # Histograma cumulativo por buckets fixos (para o Prometheus) mais uma
+    # janela com as últimas amostras (para percentis "ao vivo"). Registrar uma
+    # amostra custa um bisect e um append.
+    def __init__(self, buckets=TIME_BUCKETS, window=240):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self.recent.append(value)
+
+    def percentile(self, fraction):
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+    def snapshot(self, scale=1000.0):
+        recent = list(self.recent)
+        return {
+            "count": self.count,
+            "mean": sum(recent) / len(recent) * scale if recent else 0.0,
+            "p50": self.percentile(0.5) * scale,
+            "p95": self.percentile(0.95) * scale,
+            "max": max(recent) * scale if recent else 0.0,
+        }
+
+
+class CameraMetrics:
+    # Tempos por estágio, contadores de frames e tamanhos de JPEG do CameraApp
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.frames = Counter()
+        self.encode_sizes = RollingHistogram(SIZE_BUCKETS)
+        self.delivered_at = deque(maxlen=60)
+        self.started_at = time.perf_counter()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None: histogram = self.stages[stage] = RollingHistogram()
+            histogram.record(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def count(self, kind, amount=1):
+        with self._lock: self.frames[kind] += amount
+
+    def frame_delivered(self, captured_at):
+        now = time.perf_counter()
+        self.record("end_to_end", now - captured_at)
+        with self._lock:
+            self.frames["delivered"] += 1
+            self.delivered_at.append(now)
+
+    def fps(self):
+        # FPS dos últimos frames entregues (não conta o tempo com a câmera pausada)
+        if len(self.delivered_at) < 2: return 0.0
+        elapsed = self.delivered_at[-1] - self.delivered_at[0]
+        return (len(self.delivered_at) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def record_encode_size(self, size):
+        with self._lock: self.encode_sizes.record(size)
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.perf_counter() - self.started_at
+            return {
+                "uptime_s": round(uptime, 1),
+                "frames": dict(self.frames),
+                "fps": round(self.fps(), 2),
+                "stages_ms": {stage: {k: round(v, 3) for k, v in h.snapshot().items()} for stage, h in self.stages.items()},
+                "encode_bytes": {k: round(v) for k, v in self.encode_sizes.snapshot(scale=1).items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="quiz_ar"):
+        lines = [f"# TYPE {prefix}_frames_total counter"]
+        with self._lock:
+            for kind, value in sorted(self.frames.items()):
+                lines.append(f'{prefix}_frames_total{{kind="{kind}"}} {value}')
+            lines.append(f"# TYPE {prefix}_stage_seconds histogram")
+            for stage, histogram in sorted(self.stages.items()):
+                lines.extend(_histogram_lines(f"{prefix}_stage_seconds", f'stage="{stage}",', histogram))
+            lines.append(f"# TYPE {prefix}_encode_bytes histogram")
+            lines.extend(_histogram_lines(f"{prefix}_encode_bytes", "", self.encode_sizes))
+        return "\n".join(lines) + "\n"
+
+    def hud_text(self):
+        snapshot = self.snapshot()
+        frames = snapshot["frames"]
+        lines = [f"FPS {snapshot['fps']:.1f} | capt {frames.get('captured', 0)} "
+                 f"entr {frames.get('delivered', 0)} desc {frames.get('dropped', 0)} pul {frames.get('skipped', 0)}"]
+        for stage, stats in snapshot["stages_ms"].items():
+            lines.append(f"{stage:<12} {stats['mean']:6.2f} ms  p95 {stats['p95']:6.2f}")
+        lines.append(f"JPEG {snapshot['encode_bytes']['mean'] / 1024:.1f} KB")
+        return "\n".join(lines)
+
+
+def _histogram_lines(name, labels, histogram):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}le="{bound:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {histogram.count}')
+    labels = labels.rstrip(",")
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.total:g}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+
+class MetricsDumper:
+    # Grava periodicamente as métricas em JSON (.json) ou texto do Prometheus
+    # (qualquer outra extensão, ex.: .prom para o textfile collector)
+    def __init__(self, metrics, path, interval=10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread: return self
+        self._thread = threading.Thread(target=self._run, name="metrics-dumper", daemon=True)
+        self._thread.start()
+        return self
+
+    def dump(self):
+        content = self.metrics.to_json() if self.path.endswith(".json") else self.metrics.to_prometheus()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f: f.write(content)
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try: self.dump()
+            except OSError as e: print(f"Erro ao gravar métricas: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join()
+        self._thread = None
+
+
+class ProfilerHook:
+    # Profiling opcional, ligado e desligado em tempo de execução.
+    # "cprofile": um único cProfile.Profile, ativado em volta de cada chamada
+    # de estágio de uma só thread (thread_name, ou a primeira que chamar): no
+    # Python 3.12+ dois profilers ativos ao mesmo tempo dão ValueError.
+    # "sampling": uma thread amostra sys._current_frames() das threads da
+    # câmera (SAMPLED_THREADS) a cada `interval`, descarta as que estão paradas
+    # esperando e conta cada amostra por estágio e pela pilha completa; quase
+    # sem custo para o loop.
+    def __init__(self):
+        self.mode = None
+        self._lock = threading.Lock()
+        self._profile = None
+        self._profiled_thread = None
+        self.thread_name = None
+        self._samples = Counter()
+        self._stage_samples = Counter()
+        self._idle_samples = 0
+        self._sampler = None
+        self._sampling_stop = threading.Event()
+
+    @property
+    def active(self):
+        return self.mode is not None
+
+    def start(self, mode="sampling", interval=0.005, thread_name=None):
+        if self.active: return
+        with self._lock:
+            self._profile, self._profiled_thread = cProfile.Profile(), None
+            self._samples, self._stage_samples, self._idle_samples = Counter(), Counter(), 0
+        self.thread_name = thread_name
+        self.mode = mode
+        if mode == "sampling":
+            self._sampling_stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, args=(interval,), name="profiler-sampler", daemon=True)
+            self._sampler.start()
+
+    def call(self, func, *args):
+        if self.mode != "cprofile": return func(*args)
+        thread_id = threading.get_ident()
+        if self._profiled_thread != thread_id:
+            with self._lock:
+                if self._profiled_thread is None and self.thread_name in (None, threading.current_thread().name):
+                    self._profiled_thread = thread_id
+            if self._profiled_thread != thread_id: return func(*args)
+        profile = self._profile
+        profile.enable()
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+
+    def _sample_loop(self, interval, max_depth=8):
+        while not self._sampling_stop.wait(interval):
+            names = {t.ident: t.name for t in threading.enumerate() if t.name.startswith(SAMPLED_THREADS)}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in names: continue
+                filename = os.path.basename(frame.f_code.co_filename)
+                if filename in IDLE_FILES or (filename, frame.f_code.co_name) in IDLE_FRAMES:
+                    self._idle_samples += 1
+                    continue
+                # Sobe a pilha até a chamada do estágio (feita por ProfilerHook.call)
+                stack, stage = [], names[thread_id]
+                while frame is not None:
+                    stack.append(frame)
+                    if frame.f_back is not None and frame.f_back.f_code is ProfilerHook.call.__code__:
+                        stage = frame.f_code.co_name
+                        break
+                    frame = frame.f_back
+                self._stage_samples[stage] += 1
+                location = " < ".join(f"{os.path.basename(f.f_code.co_filename)}:{f.f_code.co_name}:{f.f_lineno}"
+                                      for f in stack[:max_depth])
+                self._samples[f"[{stage}] {location}"] += 1
+
+    @staticmethod
+    def _thread_name(thread_id):
+        thread = next((t for t in threading.enumerate() if t.ident == thread_id), None)
+        return thread.name if thread else str(thread_id)
+
+    def stop(self, limit=25):
+        # Para o profiling e devolve o relatório em texto
+        mode, self.mode = self.mode, None
+        if mode == "sampling":
+            self._sampling_stop.set()
+            if self._sampler: self._sampler.join()
+            busy = sum(self._stage_samples.values())
+            total = busy + self._idle_samples
+            if not total: return ""
+            lines = [f"{total} amostras, {self._idle_samples / total * 100:.1f}% esperando (fora das porcentagens abaixo)", "Por estágio:"]
+            lines += [f"{count / busy * 100:5.1f}%  {stage}" for stage, count in self._stage_samples.most_common()]
+            lines.append("Pilhas (topo primeiro):")
+            lines += [f"{count / busy * 100:5.1f}%  {location}" for location, count in self._samples.most_common(limit)]
+            return "\n".join(lines)
+        if mode == "cprofile":
+            if self._profiled_thread is None: return ""
+            out = io.StringIO()
+            out.write(f"Thread perfilada: {self._thread_name(self._profiled_thread)}\n")
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(limit)
+            return out.getvalue()
+        return ""
@@ -0,0 +1,129 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BOUNDARY = "quizframe"
+
+
+class FrameBroadcaster:
+    # Guarda o último JPEG publicado; cada cliente espera pelo próximo número
+    # de sequência, então vários espectadores compartilham o mesmo frame.
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._sequence = 0
+        self._closed = False
+
+    def publish(self, jpeg_bytes):
+        with self._cond:
+            self._frame = jpeg_bytes
+            self._sequence += 1
+            self._cond.notify_all()
+
+    def latest(self):
+        with self._cond:
+            return self._sequence, self._frame
+
+    def wait_for_frame(self, last_sequence, timeout=1.0):
+        with self._cond:
+            if self._sequence == last_sequence and not self._closed:
+                self._cond.wait(timeout)
+            return self._sequence, self._frame
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class _MjpegHandler(BaseHTTPRequestHandler):
+    broadcaster = None
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/stream.mjpg": self._send_stream()
+        elif path == "/snapshot.jpg": self._send_snapshot()
+        else: self.send_error(404)
+
+    def _send_snapshot(self):
+        _, frame = self.broadcaster.latest()
+        if frame is None:
+            self.send_error(503)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(frame)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            self.wfile.write(frame)
+        except OSError:
+            pass
+
+    def _send_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        sequence = 0
+        try:
+            while not self.broadcaster.closed:
+                new_sequence, frame = self.broadcaster.wait_for_frame(sequence)
+                if frame is None or new_sequence == sequence: continue
+                sequence = new_sequence
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(frame)}\r\n\r\n".encode("ascii"))
+                self.wfile.write(frame)
+                self.wfile.write(b"\r\n")
+        except OSError:
+            # Cliente fechou a aba: BrokenPipe/ConnectionReset, ou
+            # ConnectionAborted no Windows (todos são OSError)
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MjpegServer:
+    # Servidor HTTP local que entrega os frames do AR como multipart/x-mixed-replace.
+    # host é o endereço de bind; public_url (ex.: "http://quiz.local:8554" ou a
+    # URL de um proxy reverso) é o endereço que o navegador do cliente usa.
+    def __init__(self, host="127.0.0.1", port=0, public_url=None):
+        self.host = host
+        self.port = port
+        self.public_url = public_url
+        self.broadcaster = FrameBroadcaster()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        if self.public_url: return f"{self.public_url.rstrip('/')}/stream.mjpg"
+        # 0.0.0.0/:: não são endereços que o cliente consiga abrir
+        host = socket.gethostname() if self.host in ("", "0.0.0.0", "::") else self.host
+        return f"http://{host}:{self.port}/stream.mjpg"
+
+    def start(self):
+        if self._server: return self
+        if self.broadcaster.closed: self.broadcaster = FrameBroadcaster()
+        handler = type("MjpegHandler", (_MjpegHandler,), {"broadcaster": self.broadcaster})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def publish(self, jpeg_bytes):
+        self.broadcaster.publish(jpeg_bytes)
+
+    def stop(self):
+        if not self._server: return
+        self.broadcaster.close()
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+
+
+class LatestFrameSlot:
+    # Fila de uma posição: um novo item sempre substitui o anterior ainda não
+    # consumido, assim cada estágio trabalha sempre no frame mais recente.
+    def __init__(self):
+        self._item = None
+        self._has_item = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._has_item: self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._has_item and not self._closed:
+                self._cond.wait(timeout)
+            if not self._has_item: return None
+            item, self._item, self._has_item = self._item, None, False
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class FramePacer:
+    # Substitui o time.sleep fixo: dorme só o que falta para o próximo quadro
+    def __init__(self, target_fps):
+        self.interval = 1.0 / target_fps if target_fps else 0.0
+        self._next_deadline = time.perf_counter()
+
+    def wait(self):
+        if not self.interval: return
+        now = time.perf_counter()
+        self._next_deadline += self.interval
+        if self._next_deadline > now:
+            time.sleep(self._next_deadline - now)
+        else:
+            # Atrasado: não tenta "compensar" quadros perdidos
+            self._next_deadline = now
+
+
+class FramePacket:
+    __slots__ = ("frame", "captured_at", "results", "payload")
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.captured_at = time.perf_counter()
+        self.results = None
+        self.payload = None
+
+
+class PipelineStats:
+    def __init__(self, window=120):
+        self._delivered = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.delivered = 0
+
+    def record_capture(self):
+        with self._lock: self.captured += 1
+
+    def record_delivery(self, packet):
+        now = time.perf_counter()
+        with self._lock:
+            self.delivered += 1
+            self._delivered.append(now)
+            self._latencies.append(now - packet.captured_at)
+
+    def snapshot(self):
+        with self._lock:
+            timestamps = list(self._delivered)
+            latencies = sorted(self._latencies)
+            captured, delivered = self.captured, self.delivered
+        fps = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0]) if len(timestamps) > 1 and timestamps[-1] > timestamps[0] else 0.0
+        latency_ms = sum(latencies) * 1000 / len(latencies) if latencies else 0.0
+        p95_ms = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else 0.0
+        return {"fps": fps, "latency_ms": latency_ms, "latency_p95_ms": p95_ms, "captured": captured, "delivered": delivered}
+
+
+class FramePipeline:
+    # capture -> stages... -> deliver, cada um em sua própria thread, ligados
+    # por LatestFrameSlot. `capture` devolve um frame (ou None em caso de falha)
+    # e cada estágio recebe e devolve um FramePacket.
+    def __init__(self, capture, stages, deliver, target_fps=30, on_error=None):
+        self.capture = capture
+        self.stages = list(stages)
+        self.deliver = deliver
+        self.target_fps = target_fps
+        self.on_error = on_error or (lambda stage, e: print(f"Erro no estágio '{stage}': {e}"))
+        self.stats = PipelineStats()
+        self.slots = []
+        self.threads = []
+        self.is_running = False
+
+    def start(self):
+        if self.is_running: return
+        self.is_running = True
+        self.stats = PipelineStats()
+        self.slots = [LatestFrameSlot() for _ in range(len(self.stages) + 1)]
+        workers = [threading.Thread(target=self._capture_loop, name="pipeline-capture", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            workers.append(threading.Thread(target=self._stage_loop, args=(stage, self.slots[i], self.slots[i + 1]),
+                                            name=f"pipeline-{stage.__name__}", daemon=True))
+        workers.append(threading.Thread(target=self._deliver_loop, args=(self.slots[-1],), name="pipeline-deliver", daemon=True))
+        self.threads = workers
+        for t in workers: t.start()
+
+    def stop(self):
+        if not self.threads: return
+        self.is_running = False
+        for slot in self.slots: slot.close()
+        for t in self.threads:
+            if t is not threading.current_thread(): t.join()
+        self.threads = []
+
+    def dropped_frames(self):
+        return sum(slot.dropped for slot in self.slots)
+
+    def _capture_loop(self):
+        pacer = FramePacer(self.target_fps)
+        while self.is_running:
+            try:
+                frame = self.capture()
+            except Exception as e:
+                self.on_error("capture", e)
+                frame = None
+            if frame is None:
+                self.is_running = False
+                for slot in self.slots: slot.close()
+                break
+            self.stats.record_capture()
+            self.slots[0].put(FramePacket(frame))
+            pacer.wait()
+
+    def _stage_loop(self, stage, source, sink):
+        while self.is_running:
+            packet = source.get(timeout=0.1)
+            if packet is None: continue
+            try:
+                # Um estágio pode devolver None para descartar o frame
+                result = stage(packet)
+                if result is not None: sink.put(result)
+            except Exception as e:
+                self.on_error(stage.__name__, e)
+
+    def _deliver_loop(self, source):
+        while self.is_running:
+            packet = source.get(timeout=0.1)
+            if packet is None: continue
+            try:
+                self.deliver(packet)
+                self.stats.record_delivery(packet)
+            except Exception as e:
+                self.on_error("deliver", e)
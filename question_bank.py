@@ -0,0 +1,166 @@
+import csv
+import hashlib
+import json
+import os
+import random
+import threading
+
+REQUIRED_FIELDS = ("question", "options", "correct_answer", "reward_image", "difficulty")
+
+
+class _Bucket:
+    # Conjunto indexável de ids: inclusão/remoção O(1) e amostragem O(k)
+    def __init__(self):
+        self.items = []
+        self.positions = {}
+
+    def add(self, key):
+        if key in self.positions: return
+        self.positions[key] = len(self.items)
+        self.items.append(key)
+
+    def remove(self, key):
+        index = self.positions.pop(key, None)
+        if index is None: return
+        last = self.items.pop()
+        if index < len(self.items):
+            self.items[index] = last
+            self.positions[last] = index
+
+    def __len__(self):
+        return len(self.items)
+
+
+class QuestionBank:
+    # Banco de perguntas carregado de arquivos JSON Lines ou CSV, lidos em
+    # streaming. Cada pergunta é validada e indexada por (dificuldade, tópico);
+    # recarregar um arquivo alterado só mexe nas perguntas que mudaram. Um
+    # arquivo com imagens faltando é relido a cada reload(), até elas aparecerem.
+    def __init__(self, assets_dir="assets", options_per_question=4):
+        self.assets_dir = assets_dir
+        # A tela do quiz tem um botão por alternativa, então todas as perguntas
+        # precisam ter exatamente esse número de opções
+        self.options_per_question = options_per_question
+        self._lock = threading.RLock()
+        self.questions = {}
+        self.errors = []
+        self._index = {}
+        self._sources = {}
+        self._assets = set()
+
+    def _asset_exists(self, filename):
+        return filename in self._assets
+
+    def validate(self, entry):
+        missing = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+        if missing: return f"campos ausentes: {', '.join(missing)}"
+        if not isinstance(entry["options"], list) or len(entry["options"]) != self.options_per_question:
+            return f"'options' precisa ter exatamente {self.options_per_question} alternativas"
+        if entry["correct_answer"] not in entry["options"]:
+            return f"resposta '{entry['correct_answer']}' não está entre as opções"
+        if not self._asset_exists(entry["reward_image"]):
+            return f"imagem '{entry['reward_image']}' não existe em {self.assets_dir}/"
+        return None
+
+    def _read_entries(self, path):
+        if path.endswith(".csv"):
+            with open(path, newline='', encoding='utf-8') as f:
+                for line_number, row in enumerate(csv.DictReader(f), start=2):
+                    row["options"] = [o.strip() for o in (row.get("options") or "").split("|") if o.strip()]
+                    yield line_number, row
+            return
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line or line.startswith("#"): continue
+                try: yield line_number, json.loads(line)
+                except json.JSONDecodeError as e: self.errors.append(f"{path}:{line_number}: JSON inválido ({e})")
+
+    @staticmethod
+    def _key(path, entry):
+        raw = json.dumps([path] + [entry[field] for field in REQUIRED_FIELDS] + [entry.get("topic")], ensure_ascii=False)
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=12).hexdigest()
+
+    def _bucket_keys(self, question):
+        return ((question["difficulty"], None), (question["difficulty"], question["topic"]))
+
+    def load(self, path):
+        with self._lock: return self._load(path)
+
+    def _load(self, path):
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        previous = self._sources.get(path)
+        if previous and previous[0] == signature and not previous[2]: return 0
+        # Lista a pasta a cada leitura: imagens novas valem no próximo reload()
+        self._assets = set(os.listdir(self.assets_dir)) if os.path.isdir(self.assets_dir) else set()
+        self.errors = [e for e in self.errors if not e.startswith(f"{path}:")]
+        first_error = len(self.errors)
+        old_keys = previous[1] if previous else set()
+        new_keys = set()
+        added = 0
+        missing_assets = False
+        for line_number, entry in self._read_entries(path):
+            error = self.validate(entry)
+            if error:
+                self.errors.append(f"{path}:{line_number}: {error}")
+                missing_assets = missing_assets or bool(entry.get("reward_image")) and entry["reward_image"] not in self._assets
+                continue
+            key = self._key(path, entry)
+            new_keys.add(key)
+            if key in self.questions: continue
+            question = {
+                "id": key, "question": entry["question"], "options": list(entry["options"]),
+                "correct_answer": entry["correct_answer"], "reward_image": entry["reward_image"],
+                "difficulty": entry["difficulty"], "topic": entry.get("topic") or "geral",
+            }
+            self.questions[key] = question
+            for bucket in self._bucket_keys(question):
+                self._index.setdefault(bucket, _Bucket()).add(key)
+            added += 1
+        for key in old_keys - new_keys:
+            question = self.questions.pop(key)
+            for bucket in self._bucket_keys(question): self._index[bucket].remove(key)
+        errors = len(self.errors) - first_error
+        self._sources[path] = (signature, new_keys, missing_assets, errors)
+        # Numa releitura só por causa de imagens faltando, não repete os mesmos avisos
+        if not previous or previous[0] != signature or errors != previous[3]:
+            for error in self.errors[first_error:]: print(f"Pergunta ignorada: {error}")
+        return added
+
+    def reload(self):
+        with self._lock: return sum(self.load(path) for path in list(self._sources) if os.path.exists(path))
+
+    def count(self, difficulty, topic=None):
+        bucket = self._index.get((difficulty, topic))
+        return len(bucket) if bucket else 0
+
+    def sample(self, difficulty, k=None, topic=None, rng=random):
+        # random.sample numa população grande sorteia só os k índices, sem
+        # copiar nem embaralhar o balde inteiro
+        with self._lock:
+            bucket = self._index.get((difficulty, topic))
+            if not bucket: return []
+            k = len(bucket) if k is None else min(k, len(bucket))
+            return [self.questions[key] for key in rng.sample(bucket.items, k)]
+
+    def reward_images(self):
+        with self._lock: return {question["reward_image"] for question in self.questions.values()}
+
+    def topics(self):
+        with self._lock: return sorted({topic for _, topic in self._index if topic})
+
+
+_default_bank = None
+_default_lock = threading.Lock()
+
+
+def default_question_bank(path="questions.jsonl", assets_dir="assets"):
+    # Um único banco (e um único índice) para todas as sessões; cada partida
+    # só chama reload(), que não relê o arquivo se ele não mudou
+    global _default_bank
+    with _default_lock:
+        if _default_bank is None:
+            _default_bank = QuestionBank(assets_dir)
+            _default_bank.load(path)
+        return _default_bank
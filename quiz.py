@@ -1,123 +1,377 @@
 import flet as ft
-import cv2
 import base64
+import functools
 import threading
 import time
-import numpy as np
-import mediapipe as mp
-import json
-import os
 import random
+from startup import BackgroundLoader, StartupReport
+from pipeline import FramePacer, FramePacket, FramePipeline
+from mjpeg_server import MjpegServer
+from score_store import default_score_store
+from question_bank import default_question_bank
+from feedback import default_scheduler
+from event_log import default_event_log
+from instrumentation import CameraMetrics, MetricsDumper, ProfilerHook
+
+# OpenCV, NumPy e MediaPipe só são importados em CameraApp.startup_tasks(),
+# numa thread em segundo plano, para a interface aparecer sem esperar por eles.
+
+OVERLAY_WIDTH = 150
+# Mostra o login assim que o Flet estiver pronto; o AR termina de carregar por trás
+FAST_STARTUP = True
+# Em modo web com várias sessões, > 0 faz todas as sessões dividirem um único
+# pool de processos de inferência (0 = cada sessão tem seu próprio HandTracker)
+SHARED_INFERENCE_WORKERS = 0
+# Detector das âncoras do overlay: "mediapipe" (mãos), "haar" (rosto, leve),
+# "tracker" (detecta uma vez e acompanha com KCF/CSRT) ou "auto" (mede os três
+# na inicialização e usa o melhor que cabe em metade do intervalo entre frames)
+ANCHOR_DETECTOR = "auto"
+# Grava as métricas da câmera a cada 10 s: "metricas.json" (JSON) ou
+# "metricas.prom" (texto do Prometheus); None desliga
+METRICS_DUMP_PATH = None
+# Modo do profiler ligado com F3 durante o jogo: "sampling" ou "cprofile"
+PROFILER_MODE = "sampling"
+# Com "cprofile" só uma thread é perfilada, ex.: "pipeline-detect_hands"
+# (None = a primeira thread do loop da câmera que chamar um estágio)
+PROFILER_THREAD = None
+# PNG 1x1 transparente usado antes do primeiro frame da câmera
+PLACEHOLDER_PNG_B64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAACklEQVQIHWMAAQAABQABim28IAAAAABJRU5ErkJggg=="
+
+_inference_service = None
+_inference_service_lock = threading.Lock()
+
+
+def shared_inference_service():
+    global _inference_service
+    from inference_service import HandInferenceService
+    with _inference_service_lock:
+        if _inference_service is None:
+            _inference_service = HandInferenceService(workers=SHARED_INFERENCE_WORKERS).start()
+        return _inference_service
 
-def overlay_with_alpha(background_img, overlay_img, x, y):
-    h_overlay, w_overlay, _ = overlay_img.shape
-    h_bg, w_bg, _ = background_img.shape
-    x, y = int(x), int(y)
-    y1, y2 = max(0, y), min(y + h_overlay, h_bg)
-    x1, x2 = max(0, x), min(x + w_overlay, w_bg)
-    roi_bg = background_img[y1:y2, x1:x2]
-    roi_h, roi_w = roi_bg.shape[:2]
-    if roi_h > 0 and roi_w > 0:
-        overlay_cropped = overlay_img[:roi_h, :roi_w]
-        alpha = overlay_cropped[:, :, 3] / 255.0
-        overlay_rgb = overlay_cropped[:, :, :3]
-        for c in range(0, 3):
-            roi_bg[:, :, c] = (overlay_rgb[:, :, c] * alpha) + (roi_bg[:, :, c] * (1.0 - alpha))
-    return background_img
 
 class CameraApp:
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, pipelined=True, target_fps=30, encoder=None, transport="base64", stream_host="127.0.0.1", stream_port=0, stream_public_url=None, tracker=None, camera=None):
         self.page = page
         self.is_running = False
+        self.is_shut_down = False
         self.camera_thread = None
-        self.overlay_png = None
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.5)
-        placeholder_pixel = np.zeros((1, 1, 4), dtype=np.uint8)
-        _, buffer = cv2.imencode('.png', placeholder_pixel)
-        b64_string_placeholder = base64.b64encode(buffer).decode('utf-8')
-        self.camera_image = ft.Image(src_base64=b64_string_placeholder, fit=ft.ImageFit.CONTAIN, expand=True, border_radius=ft.border_radius.all(10))
-        self.stack = ft.Stack(controls=[self.camera_image])
-    
+        self.pipelined = pipelined
+        self.target_fps = target_fps
+        self.pipeline = None
+        self.started_at = None
+        self.stopped_at = None
+        self._session_frames = {}
+        self.time_to_first_ar_frame = None
+        self.camera = camera
+        self.shared_camera = False
+        self.encoder = encoder
+        # "base64": frames vão no src_base64 via page.update()
+        # "mjpeg": o ft.Image aponta para um stream HTTP local e não há page.update() por frame
+        self.transport = transport
+        # Em modo web, stream_public_url é o endereço do stream visto pelo navegador do cliente
+        self.stream_server = MjpegServer(stream_host, stream_port, stream_public_url) if transport == "mjpeg" else None
+        self.overlay_filename = None
+        self.prepared_overlay = None
+        self.asset_cache = None
+        self.tracker = tracker
+        self.mp_hands = None
+        self.hands = None
+        self.ready = threading.Event()
+        self.startup_report = None
+        self.metrics = CameraMetrics()
+        self.profiler = ProfilerHook()
+        self.metrics_dumper = MetricsDumper(self.metrics, METRICS_DUMP_PATH).start() if METRICS_DUMP_PATH else None
+        self._dropped_seen = 0
+        self._hud_updated_at = 0.0
+        self.camera_image = ft.Image(src_base64=PLACEHOLDER_PNG_B64, fit=ft.ImageFit.CONTAIN, expand=True, border_radius=ft.border_radius.all(10))
+        # HUD de desempenho (F2), desenhado por cima da câmera
+        self.hud_text = ft.Text("", size=11, font_family="monospace", color=ft.Colors.GREEN_ACCENT_400)
+        self.hud = ft.Container(self.hud_text, top=8, left=8, padding=6, bgcolor=ft.Colors.BLACK54, border_radius=6, visible=False)
+        self.stack = ft.Stack(controls=[self.camera_image, self.hud])
+
+    def startup_tasks(self, reward_images):
+        modules = {}
+
+        def import_opencv():
+            from asset_cache import default_asset_cache
+            from frame_encoder import AdaptiveFrameEncoder
+            from camera_session import default_camera_session
+            modules.update(default_asset_cache=default_asset_cache, AdaptiveFrameEncoder=AdaptiveFrameEncoder,
+                           default_camera_session=default_camera_session)
+
+        def import_mediapipe():
+            from anchor_detectors import create_detector, select_detector
+            modules.update(create_detector=create_detector, select_detector=select_detector)
+            if ANCHOR_DETECTOR == "haar": return
+            try:
+                import mediapipe
+            except ImportError as e:
+                if ANCHOR_DETECTOR != "auto": raise
+                print(f"MediaPipe indisponível, usando um detector alternativo: {e}")
+
+        def build_hands_graph():
+            # A sessão pode ter terminado antes da inicialização acabar
+            if self.is_shut_down: return
+            if self.tracker is None and SHARED_INFERENCE_WORKERS:
+                from inference_service import SharedHandTracker
+                self.tracker = SharedHandTracker(shared_inference_service())
+            if self.tracker is None and ANCHOR_DETECTOR == "auto":
+                self.tracker, timings = modules["select_detector"](budget_ms=500 / self.target_fps)
+                print(f"Detector de âncora: {self.tracker.name} (ms por frame: {timings})")
+            elif self.tracker is None:
+                self.tracker = modules["create_detector"](ANCHOR_DETECTOR)
+            self.mp_hands = self.tracker.mp_hands
+            self.hands = self.tracker.hands
+
+        def decode_assets():
+            self.asset_cache = modules["default_asset_cache"]("assets")
+            self.asset_cache.preload(reward_images, widths=(OVERLAY_WIDTH,))
+            self.asset_cache.wait_until_loaded()
+
+        def warm_up_inference():
+            self.tracker.warm_up()
+
+        def open_camera():
+            if self.is_shut_down: return
+            if self.encoder is None:
+                self.encoder = modules["AdaptiveFrameEncoder"](max_width=640, quality=75, byte_budget=40_000)
+            if self.camera is None:
+                # Compartilhada por todas as sessões do processo; fechada na saída
+                self.camera = modules["default_camera_session"](device=0, width=640, height=480, fps=30, mirror=True)
+                self.shared_camera = True
+            self.camera.open()
+
+        return [
+            ("import_opencv_numpy", import_opencv),
+            ("import_mediapipe", import_mediapipe),
+            ("hands_graph", build_hands_graph),
+            ("reward_assets", decode_assets),
+            ("warmup_inference", warm_up_inference),
+            ("camera_open", open_camera),
+        ]
+
     def set_overlay_image(self, image_filename):
+        if not self.ready.wait(timeout=15):
+            print("Erro: recursos de AR ainda não carregados.")
+            return False
+        if self.asset_cache is None or self.tracker is None or self.camera is None or self.encoder is None:
+            # Alguma tarefa da inicialização falhou (ver BackgroundLoader.errors)
+            print("Erro: recursos de AR incompletos, o AR fica desativado.")
+            return False
         try:
-            path = f'assets/{image_filename}'
-            self.overlay_png = cv2.imread(path, cv2.IMREAD_UNCHANGED)
-            if self.overlay_png is None or self.overlay_png.shape[2] != 4:
-                raise ValueError(f"Imagem '{image_filename}' não encontrada ou sem transparência.")
+            self.prepared_overlay = self.asset_cache.get(image_filename, OVERLAY_WIDTH)
+            self.overlay_filename = image_filename
             return True
         except Exception as e:
             print(f"Erro ao carregar a imagem de overlay: {e}")
-            self.overlay_png = None
+            self.overlay_filename = None
+            self.prepared_overlay = None
             return False
 
     def start(self):
-        if self.is_running or self.overlay_png is None: return
-        self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        if not self.cap.isOpened():
-            print("Erro: Não foi possível abrir a câmera.")
-            return
+        # Devolve True se o loop da câmera está rodando
+        if self.is_running: return True
+        if self.overlay_filename is None or self.tracker is None or self.encoder is None or self.camera is None: return False
+        self.started_at = time.perf_counter()
+        self.stopped_at = None
+        self._session_frames = self.metrics.snapshot()["frames"]
+        self.time_to_first_ar_frame = None
+        if not self.camera.resume(): return False
+        try:
+            self._dropped_seen = 0
+            self.tracker.reset()
+            if self.stream_server:
+                self.stream_server.start()
+                if self.camera_image.src != self.stream_server.url:
+                    self.camera_image.src = self.stream_server.url
+                    self.camera_image.src_base64 = None
+                    self.page.update()
+        except Exception as e:
+            print(f"Erro ao iniciar o AR: {e}")
+            self.camera.pause()
+            return False
+        # Só marca como rodando depois que tudo acima deu certo
         self.is_running = True
-        self.camera_thread = threading.Thread(target=self.update_camera_thread, daemon=True)
-        self.camera_thread.start()
+        if self.pipelined:
+            self.pipeline = FramePipeline(
+                self.profiled(self.capture_frame),
+                [self.profiled(stage) for stage in (self.detect_hands, self.composite_overlay, self.encode_frame)],
+                self.profiled(self.deliver_frame), target_fps=self.target_fps,
+                on_error=lambda stage, e: print(f"Erro no loop da câmera ({stage}): {e}")
+            )
+            self.pipeline.start()
+        else:
+            self.camera_thread = threading.Thread(target=self.update_camera_thread, name="camera-loop", daemon=True)
+            self.camera_thread.start()
+        return True
 
     def stop(self):
         if not self.is_running: return
         self.is_running = False
+        self.stopped_at = time.perf_counter()
+        if self.pipeline:
+            print(f"Pipeline da câmera: {self.performance_report()}")
+            self.pipeline.stop()
         if self.camera_thread: self.camera_thread.join()
-        if hasattr(self, 'cap') and self.cap.isOpened(): self.cap.release()
+        self.camera.pause()
+
+    def shutdown(self):
+        # Chamado ao fechar a janela (desktop) ou quando a sessão web termina
+        if self.is_shut_down: return
+        self.is_shut_down = True
+        self.stop()
+        if self.camera and not self.shared_camera: self.camera.close()
+        if self.tracker: self.tracker.close()
+        if self.stream_server: self.stream_server.stop()
+        if self.profiler.active: self.toggle_profiling()
+        if self.metrics_dumper:
+            self.metrics_dumper.stop()
+            try: self.metrics_dumper.dump()
+            except OSError as e: print(f"Erro ao gravar métricas: {e}")
         print("Câmera e recursos de AR liberados.")
 
+    def performance_report(self):
+        report = self.pipeline.stats.snapshot() if self.pipeline else {}
+        report["camera"] = self.camera.stats() if self.camera else None
+        report["time_to_first_ar_frame_ms"] = self.time_to_first_ar_frame * 1000 if self.time_to_first_ar_frame is not None else None
+        report["encoder"] = self.encoder.stats() if self.encoder else None
+        if self.pipeline: report["dropped"] = self.pipeline.dropped_frames()
+        report["metrics"] = self.metrics.snapshot()
+        return report
+
+    def session_stats(self):
+        # Frames da última exibição do AR (entre start() e stop())
+        if self.started_at is None: return {}
+        elapsed = (self.stopped_at or time.perf_counter()) - self.started_at
+        frames = self.metrics.snapshot()["frames"]
+        delivered = frames.get("delivered", 0) - self._session_frames.get("delivered", 0)
+        return {"fps": round(delivered / elapsed, 2) if elapsed > 0 else 0.0, "frames": delivered,
+                "dropped": frames.get("dropped", 0) - self._session_frames.get("dropped", 0)}
+
+    def profiled(self, stage):
+        # O ProfilerHook só interfere na chamada quando o cProfile está ligado;
+        # o wraps mantém o nome do estágio nas threads e erros do pipeline
+        @functools.wraps(stage)
+        def call(*args):
+            return self.profiler.call(stage, *args)
+        return call
+
+    def toggle_profiling(self):
+        if not self.profiler.active:
+            self.profiler.start(PROFILER_MODE, thread_name=PROFILER_THREAD)
+            print(f"Profiler ligado ({PROFILER_MODE}).")
+            return
+        print(f"Relatório do profiler:\n{self.profiler.stop()}")
+
+    def toggle_hud(self):
+        self.hud.visible = not self.hud.visible
+        if self.hud.visible: self.hud_text.value = self.metrics.hud_text()
+        self.page.update()
+
+    def handle_key(self, e):
+        # Teclas de função, para não conflitar com o campo de nome do login
+        if e.key == "F2": self.toggle_hud()
+        elif e.key == "F3": self.toggle_profiling()
+
+    def refresh_hud(self, interval=0.5):
+        # Atualiza o texto do HUD no máximo duas vezes por segundo
+        if not self.hud.visible: return False
+        now = time.perf_counter()
+        if now - self._hud_updated_at < interval: return False
+        self._hud_updated_at = now
+        self.hud_text.value = self.metrics.hud_text()
+        return True
+
+    def capture_frame(self):
+        with self.metrics.time("capture"):
+            frame = self.camera.read()
+        if frame is not None: self.metrics.count("captured")
+        return frame
+
+    def detect_hands(self, packet):
+        with self.metrics.time("detect"):
+            packet.results = self.tracker.process(packet.frame, packet.captured_at)
+        return packet
+
+    def composite_overlay(self, packet):
+        with self.metrics.time("composite"):
+            frame = packet.frame
+            frame_h, frame_w, _ = frame.shape
+            overlay = self.prepared_overlay
+            for anchor_x, anchor_y in packet.results:
+                center_x = int(anchor_x * frame_w)
+                center_y = int(anchor_y * frame_h)
+                draw_x = center_x - (overlay.width // 2)
+                draw_y = center_y - (overlay.height // 2)
+                frame = overlay.blend_into(frame, draw_x, draw_y)
+            packet.frame = frame
+        return packet
+
+    def encode_frame(self, packet):
+        with self.metrics.time("resize"):
+            frame = self.encoder.prepare(packet.frame)
+        with self.metrics.time("jpeg"):
+            data = self.encoder.encode_prepared(frame)
+        if data is None:
+            self.metrics.count("skipped")
+            return None
+        self.metrics.record_encode_size(len(data))
+        packet.payload = data
+        return packet
+
+    def deliver_frame(self, packet):
+        if self.time_to_first_ar_frame is None:
+            self.time_to_first_ar_frame = time.perf_counter() - self.started_at
+            print(f"Tempo até o primeiro frame de AR: {self.time_to_first_ar_frame * 1000:.0f} ms")
+        if self.stream_server:
+            with self.metrics.time("publish"):
+                self.stream_server.publish(packet.payload)
+            if self.refresh_hud(): self.page.update()
+        else:
+            with self.metrics.time("base64"):
+                self.camera_image.src_base64 = base64.b64encode(packet.payload).decode('utf-8')
+            self.refresh_hud()
+            with self.metrics.time("page_update"):
+                self.page.update()
+        self.metrics.frame_delivered(packet.captured_at)
+        if self.pipeline:
+            dropped = self.pipeline.dropped_frames()
+            self.metrics.count("dropped", dropped - self._dropped_seen)
+            self._dropped_seen = dropped
+
     def update_camera_thread(self):
+        # Modo sequencial (pipelined=False): todos os estágios na mesma thread
+        pacer = FramePacer(self.target_fps)
         while self.is_running:
             try:
-                ret, frame = self.cap.read()
-                if not ret: break
-                frame = cv2.flip(frame, 1)
-                frame_h, frame_w, _ = frame.shape
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.hands.process(rgb_frame)
-                if results.multi_hand_landmarks:
-                    for hand_landmarks in results.multi_hand_landmarks:
-                        wrist = hand_landmarks.landmark[self.mp_hands.HandLandmark.WRIST]
-                        middle_finger_mcp = hand_landmarks.landmark[self.mp_hands.HandLandmark.MIDDLE_FINGER_MCP]
-                        center_x = int(((wrist.x + middle_finger_mcp.x) / 2) * frame_w)
-                        center_y = int(((wrist.y + middle_finger_mcp.y) / 2) * frame_h)
-                        overlay_w = 150
-                        overlay_h = int(overlay_w * (self.overlay_png.shape[0] / self.overlay_png.shape[1]))
-                        resized_overlay = cv2.resize(self.overlay_png, (overlay_w, overlay_h))
-                        draw_x = center_x - (overlay_w // 2)
-                        draw_y = center_y - (overlay_h // 2)
-                        frame = overlay_with_alpha(frame, resized_overlay, draw_x, draw_y)
-                _, buffer = cv2.imencode('.jpg', frame)
-                b64_string = base64.b64encode(buffer).decode('utf-8')
-                self.camera_image.src_base64 = b64_string
-                self.page.update()
-                time.sleep(1/60)
+                frame = self.profiler.call(self.capture_frame)
+                if frame is None: break
+                packet = FramePacket(frame)
+                for stage in (self.detect_hands, self.composite_overlay, self.encode_frame, self.deliver_frame):
+                    if self.profiler.call(stage, packet) is None: break
+                pacer.wait()
             except Exception as e:
                 print(f"Erro no loop da câmera: {e}")
 
 class QuizManager:
     
-    def __init__(self, page, ar_app):
+    def __init__(self, page, ar_app, score_store=None, question_bank=None, questions_per_game=10, scheduler=None, event_log=None):
         self.page = page
         self.ar_app = ar_app
+        # Estados: login -> difficulty -> question -> feedback -> (ar_reward) -> question ... -> final
+        self.state = "login"
+        self.round_id = 0
+        self.scheduler = scheduler or default_scheduler()
         self.scores_file = "scores.json"
+        # O scores.json antigo é importado na primeira execução com o banco vazio
+        self.score_store = score_store or default_score_store("scores.db", import_json=self.scores_file)
+        # Respostas, tempos e dados do AR de cada jogada, gravados em lote fora da UI
+        self.event_log = event_log or default_event_log()
         
-        self.full_quiz_data = [
-            {"question": "Qual é o principal dispositivo para clicar e mover o cursor na tela?", "options": ["Mouse", "Teclado", "Impressora", "Monitor"], "correct_answer": "Mouse", "reward_image": "mouse.png", "difficulty": "facil"},
-            {"question": "Qual componente é o 'cérebro' do computador?", "options": ["Processador (CPU)", "Placa de Som", "Memória RAM", "Gabinete"], "correct_answer": "Processador (CPU)", "reward_image": "processor.png", "difficulty": "facil"},
-            {"question": "Qual peça é a principal responsável por exibir os gráficos de um jogo?", "options": ["Placa de Vídeo (GPU)", "SSD", "Fonte de Alimentação", "Cooler"], "correct_answer": "Placa de Vídeo (GPU)", "reward_image": "gpu.png", "difficulty": "facil"},
-            {"question": "Qual dispositivo de entrada é usado para digitar textos e comandos?", "options": ["Teclado", "Mouse", "Microfone", "Scanner"], "correct_answer": "Teclado", "reward_image": "keyboard.png", "difficulty": "facil"},
-            {"question": "Se o PC fica lento com muitas abas abertas, qual tipo de memória está sobrecarregada?", "options": ["Memória RAM", "Memória Cache", "Memória ROM", "Armazenamento do HD"], "correct_answer": "Memória RAM", "reward_image": "ram.png", "difficulty": "medio"},
-            {"question": "Para acelerar o tempo de boot e o carregamento de programas, qual upgrade é mais eficaz?", "options": ["Trocar o HDD por um SSD", "Aumentar a Memória RAM", "Comprar um Monitor Maior", "Instalar mais Coolers"], "correct_answer": "Trocar o HDD por um SSD", "reward_image": "ssd.png", "difficulty": "medio"},
-            {"question": "Onde todos os componentes principais de um desktop são fisicamente conectados?", "options": ["Placa-Mãe", "Processador (CPU)", "Gabinete", "Disco Rígido (HD)"], "correct_answer": "Placa-Mãe", "reward_image": "computer.png", "difficulty": "medio"},
-            {"question": "Qual componente converte a energia da tomada para alimentar o seu PC?", "options": ["Fonte de Alimentação", "Estabilizador", "Placa de Rede", "Bateria"], "correct_answer": "Fonte de Alimentação", "reward_image": "fonte.png", "difficulty": "medio"},
-            {"question": "A velocidade de um processador em Gigahertz (GHz) representa fundamentalmente o quê?", "options": ["Ciclos por segundo", "Bytes por segundo", "Cálculos por ciclo", "Temperatura máxima"], "correct_answer": "Ciclos por segundo", "reward_image": "processor.png", "difficulty": "dificil"},
-            {"question": "Qual é o nome do dispositivo de armazenamento magnético e rotativo, mais antigo que o SSD?", "options": ["Disco Rígido (HDD)", "Disquete", "Fita Cassete", "CD-R"], "correct_answer": "Disco Rígido (HDD)", "reward_image": "hd.png", "difficulty": "dificil"},
-            {"question": "Qual protocolo de rede é mais comumente usado para obter um endereço IP automaticamente?", "options": ["DHCP", "HTTP", "FTP", "DNS"], "correct_answer": "DHCP", "reward_image": "ethernet.png", "difficulty": "dificil"},
-            {"question": "Em uma placa de vídeo, o que a sigla 'VRAM' significa?", "options": ["Video Random Access Memory", "Virtual Reality Asset Module", "Volatile Read-Only Memory", "Very Rapid Access Memory"], "correct_answer": "Video Random Access Memory", "reward_image": "gpu.png", "difficulty": "dificil"},
-        ]
+        self.question_bank = question_bank or default_question_bank("questions.jsonl", "assets")
+        self.questions_per_game = questions_per_game
+        self.selected_topic = None
         self.reset_game_state()
 
         
@@ -169,7 +423,7 @@ class QuizManager:
             color=ft.Colors.WHITE, bgcolor=ft.Colors.WHITE24,
             shape=ft.RoundedRectangleBorder(radius=8),
         )
-        self.answer_buttons = [ft.ElevatedButton(text=f"Opção {i+1}", width=300, style=answer_button_style) for i in range(4)]
+        self.answer_buttons = [ft.ElevatedButton(text=f"Opção {i+1}", width=300, style=answer_button_style) for i in range(self.question_bank.options_per_question)]
         
         top_bar = ft.Row([ft.Column([self.username_display, self.lives_text]), self.score_text], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
         self.quiz_view = ft.Column(
@@ -186,18 +440,14 @@ class QuizManager:
         
         self.load_and_display_high_score()
 
-    def load_scores(self):
-        if not os.path.exists(self.scores_file): return []
-        with open(self.scores_file, 'r') as f:
-            try: return json.load(f)
-            except json.JSONDecodeError: return []
+    def load_scores(self, limit=10):
+        return self.score_store.top(limit)
 
     def is_username_taken(self, username):
-        scores = self.load_scores()
-        return any(score['username'].lower() == username.lower() for score in scores)
+        return self.score_store.is_username_taken(username)
 
     def load_and_display_high_score(self):
-        scores = self.load_scores()
+        scores = self.load_scores(1)
         if scores: self.high_score_text.value = f"🏆 Recorde: {scores[0]['username']} - {scores[0]['score']} pts"
         else: self.high_score_text.value = "Seja o primeiro a marcar pontos!"
         if self.login_view.visible: self.page.update()
@@ -205,6 +455,17 @@ class QuizManager:
     def reset_game_state(self):
         self.username = ""; self.score = 0; self.lives = 3; self.current_question_index = 0
         self.selected_difficulty = None; self.current_quiz_questions = []
+        self.game_id = None; self.question_shown_at = None
+        # Invalida qualquer feedback ainda agendado da partida anterior
+        self.round_id = getattr(self, "round_id", 0) + 1
+
+    def schedule(self, delay, callback, *args, blocking=False):
+        # blocking=True para callbacks que podem esperar por I/O (AR, câmera)
+        round_id = self.round_id
+        def run():
+            if round_id == self.round_id: callback(*args)
+        if blocking: self.scheduler.call_later_blocking(delay, run)
+        else: self.scheduler.call_later(delay, run)
 
     def show_difficulty_selection(self, e):
         username = self.username_field.value.strip()
@@ -213,6 +474,7 @@ class QuizManager:
         if self.is_username_taken(username):
             self.username_field.error_text = f"O nick '{username}' já existe. Tente outro."; self.page.update(); return
         self.username = username
+        self.state = "difficulty"
         self.login_view.visible = False
         self.high_score_container.visible = False # Esconde o recorde
         self.difficulty_view.visible = True
@@ -220,8 +482,10 @@ class QuizManager:
 
     def select_difficulty(self, e):
         self.selected_difficulty = e.control.data
-        self.current_quiz_questions = [q for q in self.full_quiz_data if q['difficulty'] == self.selected_difficulty]
-        random.shuffle(self.current_quiz_questions)
+        self.question_bank.reload()
+        self.current_quiz_questions = self.question_bank.sample(self.selected_difficulty, self.questions_per_game, topic=self.selected_topic)
+        self.game_id = self.event_log.new_game_id()
+        self.event_log.record("game_start", self.game_id, difficulty=self.selected_difficulty)
         self.difficulty_view.visible = False
         self.quiz_view.visible = True
         self.username_display.value = f"Jogador: {self.username}"
@@ -238,25 +502,36 @@ class QuizManager:
             btn.style.bgcolor = ft.Colors.WHITE24
             btn.disabled = False
             btn.on_click = lambda ev, ans=options[i]: self.check_answer(ev, ans, correct_answer)
+        self.state = "question"
         self.page.update()
+        self.question_shown_at = time.perf_counter()
 
     def check_answer(self, e, chosen_answer, correct_answer):
+        # O handler só marca a resposta e agenda o próximo passo, sem dormir
+        if self.state != "question": return
+        self.state = "feedback"
+        answer_ms = (time.perf_counter() - self.question_shown_at) * 1000
         self.disable_all_buttons()
+        self.event_log.record("answer", self.game_id, difficulty=self.selected_difficulty,
+                              question=self.current_quiz_questions[self.current_question_index], answer=chosen_answer,
+                              correct=chosen_answer == correct_answer, answer_ms=answer_ms)
         if chosen_answer == correct_answer:
             e.control.style.bgcolor = ft.Colors.GREEN
             self.score += 5
             self.page.update()
-            time.sleep(0.75)
-            self.show_ar_reward()
+            # show_ar_reward espera o AR carregar e abre a câmera
+            self.schedule(0.75, self.show_ar_reward, blocking=True)
         else:
             e.control.style.bgcolor = ft.Colors.RED
             self.lives -= 1
             self.page.update()
-            time.sleep(1.5)
-            if self.lives == 0:
-                self.show_final_screen(game_over=True)
-            else:
-                self.next_question(None)
+            self.schedule(1.5, self.after_wrong_answer)
+
+    def after_wrong_answer(self):
+        if self.lives == 0:
+            self.show_final_screen(game_over=True)
+        else:
+            self.next_question(None)
 
     def show_ar_reward(self):
         self.page.bgcolor = None
@@ -266,20 +541,30 @@ class QuizManager:
         )
         reward_image_filename = self.current_quiz_questions[self.current_question_index]["reward_image"]
         if not self.ar_app.set_overlay_image(reward_image_filename):
-            self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao carregar a imagem!"), bgcolor=ft.Colors.RED)
-            self.page.snack_bar.open = True; self.page.update()
-            time.sleep(0.75); self.next_question(None)
-            return
+            self.skip_ar_reward("Erro ao carregar a imagem!"); return
+        if not self.ar_app.start():
+            self.skip_ar_reward("Erro ao iniciar a câmera!"); return
         
+        self.state = "ar_reward"
         self.quiz_view.visible = False
         self.ar_view_container.visible = True
-        self.ar_app.start(); self.page.update()
+        self.page.update()
+
+    def skip_ar_reward(self, message):
+        self.page.snack_bar = ft.SnackBar(ft.Text(message), bgcolor=ft.Colors.RED)
+        self.page.snack_bar.open = True; self.page.update()
+        self.schedule(0.75, self.next_question, None)
     
     def next_question(self, e):
+        if self.state not in ("feedback", "ar_reward"): return
         self.page.gradient = None
         self.page.bgcolor = ft.Colors.DEEP_PURPLE_400
         
         self.ar_app.stop()
+        if self.state == "ar_reward":
+            self.event_log.record("ar_reward", self.game_id, difficulty=self.selected_difficulty,
+                                  question=self.current_quiz_questions[self.current_question_index],
+                                  ar_stats=self.ar_app.session_stats())
         self.ar_view_container.visible = False
         if self.current_question_index < len(self.current_quiz_questions) - 1:
             self.current_question_index += 1
@@ -296,6 +581,9 @@ class QuizManager:
         )
         self.page.bgcolor = None
         
+        self.state = "final"
+        self.event_log.record("game_over" if game_over else "game_completed", self.game_id,
+                              difficulty=self.selected_difficulty, score=self.score)
         self.quiz_view.visible = False; self.ar_view_container.visible = False; self.final_view.visible = True
         if game_over:
             self.final_message.value = "Game Over!"; self.final_message.color = ft.Colors.RED
@@ -307,16 +595,14 @@ class QuizManager:
         self.page.update()
         
     def save_score(self):
-        scores = self.load_scores()
-        scores.append({"username": self.username, "score": self.score})
-        scores = sorted(scores, key=lambda x: x['score'], reverse=True)[:10]
-        with open(self.scores_file, 'w') as f: json.dump(scores, f, indent=4)
+        self.score_store.add_score(self.username, self.score)
 
     def reset_quiz(self, e):
         self.page.gradient = None
         self.page.bgcolor = ft.Colors.DEEP_PURPLE_400
         
         self.reset_game_state(); self.username_field.value = ""; self.username_field.error_text = None
+        self.state = "login"
         self.final_view.visible = False
         self.login_view.visible = True
         self.high_score_container.visible = True
@@ -335,8 +621,11 @@ def main(page: ft.Page):
     page.vertical_alignment = ft.MainAxisAlignment.CENTER
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
     
+    startup_report = StartupReport()
+    startup_report.mark("flet_ready")
     ar_app = CameraApp(page)
     quiz_manager = QuizManager(page, ar_app)
+    ar_app.startup_report = startup_report
 
 
     # Conteúdo principal que será centralizado
@@ -356,10 +645,17 @@ def main(page: ft.Page):
     )
 
 
+    loading_badge = ft.Container(
+        ft.Row([ft.ProgressRing(color=ft.Colors.WHITE, width=14, height=14, stroke_width=2),
+                ft.Text("Carregando AR...", size=12, color=ft.Colors.WHITE70)], spacing=8),
+        top=10, left=10, padding=8, bgcolor=ft.Colors.BLACK26, border_radius=8, visible=FAST_STARTUP
+    )
+
     app_layout = ft.Stack(
         [
             main_content,
             quiz_manager.high_score_container, 
+            loading_badge,
         ],
         expand=True
     )
@@ -382,7 +678,7 @@ def main(page: ft.Page):
     
 
     switcher = ft.AnimatedSwitcher(
-        content=splash_container,
+        content=app_layout if FAST_STARTUP else splash_container,
         transition=ft.AnimatedSwitcherTransition.FADE,
         duration=500,
         switch_in_curve=ft.AnimationCurve.EASE_IN,
@@ -390,20 +686,34 @@ def main(page: ft.Page):
     )
 
     def show_main_app():
-        time.sleep(3)
+        # O splash (ou o aviso de carregamento) some quando o AR está de fato pronto
+        loading_badge.visible = False
         switcher.content = app_layout
+        ar_app.ready.set()
         page.update()
     
     def on_window_event(e):
         if e.data == "close":
-            ar_app.stop()
+            ar_app.shutdown()
             page.window_destroy()
     page.on_window_event = on_window_event
+    # Em modo web não há evento de janela: a aba fechada só aparece como
+    # desconexão ou fim da sessão, e sem isso a sessão de inferência (memória
+    # compartilhada), o servidor MJPEG e a câmera ficariam presos
+    page.on_disconnect = lambda e: ar_app.shutdown()
+    page.on_close = lambda e: ar_app.shutdown()
+    page.on_keyboard_event = ar_app.handle_key
     
     page.add(switcher)
+    startup_report.mark("first_view_shown")
     
-    threading.Thread(target=show_main_app, daemon=True).start()
+    loader = BackgroundLoader(startup_report)
+    for name, task in ar_app.startup_tasks(quiz_manager.question_bank.reward_images()):
+        loader.add_task(name, task)
+    loader.on_ready(show_main_app)
+    loader.start()
     
     page.update()
 
-ft.app(target=main, assets_dir="assets")
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main, assets_dir="assets")
\ No newline at end of file
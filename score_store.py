@@ -0,0 +1,221 @@
+import atexit
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+class ScoreStore:
+    # Interface comum dos backends de pontuação usados pelo QuizManager
+    def is_username_taken(self, username):
+        raise NotImplementedError
+
+    def add_score(self, username, score):
+        raise NotImplementedError
+
+    def top(self, limit=10):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteScoreStore(ScoreStore):
+    # Histórico completo em SQLite (WAL). O nick é único sem diferenciar
+    # maiúsculas (casefold, que também cobre acentos como "É"/"é") e o ranking
+    # usa um índice em score, então checar nick e buscar o top-N é O(log n).
+    # Leituras ficam em cache até alguma escrita, inclusive de outro processo
+    # (detectada por PRAGMA data_version). Do nick só os já usados vão para o
+    # cache: guardar as respostas negativas faria o cache crescer com cada nick
+    # digitado, e a busca no índice único já é barata.
+    def __init__(self, path="scores.db", import_json=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS players (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                username_key TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS scores (
+                id INTEGER PRIMARY KEY,
+                player_id INTEGER NOT NULL REFERENCES players(id),
+                score INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_scores_ranking ON scores(score DESC, id);
+        """)
+        self._cache_version = None
+        self._top_cache = {}
+        self._taken_usernames = set()
+        if import_json: self.import_json(import_json)
+
+    def _check_cache(self):
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._cache_version:
+            self._cache_version = version
+            self._top_cache.clear()
+            self._taken_usernames.clear()
+
+    def _invalidate(self):
+        self._cache_version = None
+        self._top_cache.clear()
+        self._taken_usernames.clear()
+
+    def is_username_taken(self, username):
+        key = username.casefold()
+        with self._lock:
+            self._check_cache()
+            if key in self._taken_usernames: return True
+            if self._conn.execute("SELECT 1 FROM players WHERE username_key = ?", (key,)).fetchone() is None: return False
+            self._taken_usernames.add(key)
+            return True
+
+    def add_score(self, username, score):
+        with self._lock:
+            # O bloco "with" da conexão faz o commit (ou rollback) de forma atômica
+            with self._conn:
+                self._conn.execute("INSERT OR IGNORE INTO players (username, username_key) VALUES (?, ?)",
+                                   (username, username.casefold()))
+                player_id = self._conn.execute("SELECT id FROM players WHERE username_key = ?",
+                                               (username.casefold(),)).fetchone()[0]
+                self._conn.execute("INSERT INTO scores (player_id, score, created_at) VALUES (?, ?, ?)",
+                                   (player_id, int(score), time.time()))
+            self._invalidate()
+
+    def add_scores(self, entries):
+        with self._lock:
+            with self._conn:
+                now = time.time()
+                self._conn.executemany("INSERT OR IGNORE INTO players (username, username_key) VALUES (?, ?)",
+                                       ((username, username.casefold()) for username, _ in entries))
+                self._conn.executemany(
+                    "INSERT INTO scores (player_id, score, created_at) "
+                    "SELECT id, ?, ? FROM players WHERE username_key = ?",
+                    ((int(score), now, username.casefold()) for username, score in entries))
+            self._invalidate()
+
+    def top(self, limit=10):
+        with self._lock:
+            self._check_cache()
+            if limit not in self._top_cache:
+                rows = self._conn.execute(
+                    "SELECT p.username, s.score FROM scores s JOIN players p ON p.id = s.player_id "
+                    "ORDER BY s.score DESC, s.id LIMIT ?", (limit,)).fetchall()
+                self._top_cache[limit] = [{"username": username, "score": score} for username, score in rows]
+            return list(self._top_cache[limit])
+
+    def import_json(self, path):
+        # Importa o scores.json antigo só uma vez, quando o banco ainda está vazio
+        if not os.path.exists(path): return 0
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM scores LIMIT 1").fetchone(): return 0
+        with open(path, 'r') as f:
+            try: entries = json.load(f)
+            except json.JSONDecodeError: return 0
+        self.add_scores([(e["username"], e["score"]) for e in entries])
+        return len(entries)
+
+    def close(self):
+        with self._lock: self._conn.close()
+
+
+class JsonScoreStore(ScoreStore):
+    # Mantém o formato do scores.json, mas grava de forma atômica (arquivo
+    # temporário + os.replace) e só relê o arquivo quando o mtime muda.
+    def __init__(self, path="scores.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._scores = None
+        self._usernames = set()
+        self._mtime = None
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if self._scores is not None and mtime == self._mtime: return
+        scores = []
+        if mtime is not None:
+            with open(self.path, 'r') as f:
+                try: scores = json.load(f)
+                except json.JSONDecodeError: scores = []
+        self._scores = sorted(scores, key=lambda x: x['score'], reverse=True)
+        self._usernames = {s['username'].casefold() for s in self._scores}
+        self._mtime = mtime
+
+    def is_username_taken(self, username):
+        with self._lock:
+            self._load()
+            return username.casefold() in self._usernames
+
+    def add_score(self, username, score):
+        with self._lock:
+            self._load()
+            scores = sorted(self._scores + [{"username": username, "score": score}], key=lambda x: x['score'], reverse=True)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f: json.dump(scores, f, indent=4)
+            os.replace(tmp_path, self.path)
+            self._scores = None
+
+    def top(self, limit=10):
+        with self._lock:
+            self._load()
+            return list(self._scores[:limit])
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_score_store(path="scores.db", import_json=None):
+    # Uma única conexão (já protegida por lock) para todas as sessões,
+    # fechada na saída do processo
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = SQLiteScoreStore(path, import_json=import_json)
+            atexit.register(_default_store.close)
+        return _default_store
+
+
+def _benchmark(players=100_000):
+    import random
+    import shutil
+    directory = tempfile.mkdtemp()
+    try:
+        store = SQLiteScoreStore(os.path.join(directory, "bench.db"))
+        entries = [(f"player{i}", random.randint(0, 60)) for i in range(players)]
+        start = time.perf_counter()
+        store.add_scores(entries)
+        print(f"Inserção em lote de {players} jogadores: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        lookups = 10_000
+        start = time.perf_counter()
+        for i in range(lookups):
+            store.is_username_taken(f"PLAYER{random.randrange(players * 2)}")
+        print(f"is_username_taken: {(time.perf_counter() - start) * 1e6 / lookups:.1f} µs/consulta")
+
+        inserts = 1_000
+        start = time.perf_counter()
+        for i in range(inserts):
+            store.add_score(f"novo{i}", random.randint(0, 60))
+        print(f"add_score: {(time.perf_counter() - start) * 1e6 / inserts:.1f} µs/inserção")
+
+        start = time.perf_counter()
+        store.top(10)
+        cold_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        store.top(10)
+        print(f"top(10): {cold_ms:.2f} ms (frio), {(time.perf_counter() - start) * 1000:.3f} ms (cache)")
+        store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    _benchmark()
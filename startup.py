@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+PROCESS_START = time.perf_counter()
+
+
+class StartupReport:
+    # Registra quanto tempo cada fase da inicialização levou
+    def __init__(self):
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock: self.phases[name] = round(seconds * 1000, 1)
+
+    def mark(self, name):
+        # Tempo desde o início do processo até este ponto
+        self.record(name, time.perf_counter() - PROCESS_START)
+
+    def as_dict(self):
+        with self._lock: return dict(self.phases)
+
+    def __str__(self):
+        return json.dumps(self.as_dict(), indent=2)
+
+
+class BackgroundLoader:
+    # Roda as tarefas pesadas em ordem numa thread e sinaliza `ready` no fim,
+    # mesmo que alguma falhe (a falha fica em `errors`).
+    def __init__(self, report=None):
+        self.report = report or StartupReport()
+        self.ready = threading.Event()
+        self.errors = {}
+        self._tasks = []
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def add_task(self, name, func):
+        self._tasks.append((name, func))
+
+    def on_ready(self, callback):
+        with self._lock:
+            if not self.ready.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def start(self):
+        threading.Thread(target=self._run, name="startup-loader", daemon=True).start()
+
+    def _run(self):
+        for name, func in self._tasks:
+            try:
+                with self.report.phase(name): func()
+            except Exception as e:
+                self.errors[name] = e
+                print(f"Erro na inicialização ({name}): {e}")
+        self.report.mark("ready_since_process_start")
+        with self._lock:
+            self.ready.set()
+            callbacks, self._callbacks = self._callbacks, []
+        print(f"Inicialização concluída: {self.report}")
+        for callback in callbacks: callback()